@@ -1,38 +1,60 @@
+import uuid
 from typing import Generator, AsyncGenerator
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from core.config import settings
-from core import security
+from core import principals, security, sessions
 from db.session import get_db
 from models.user import User
 from schemas.token import TokenPayload
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
-async def get_current_user(
+async def get_current_principal(
     db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme)
-) -> User:
+) -> principals.Principal:
+    """
+    The authenticated user with their lawyer profile id. Resolved once per request
+    (FastAPI caches dependencies), and across requests by the principal cache.
+    """
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
         token_data = TokenPayload(**payload)
-    except (JWTError, ValidationError):
+        user_id = uuid.UUID(token_data.sub)
+    except (JWTError, ValidationError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+    if token_data.type == "refresh":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
+    # Usually answered by the in-process Bloom filter, without Redis
+    if token_data.sid and await sessions.is_session_revoked(token_data.sid):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Session has been revoked",
+        )
     
-    query = select(User).where(User.id == token_data.sub)
-    result = await db.execute(query)
-    user = result.scalar_one_or_none()
+    # Cached: steady-state requests authenticate without a database query
+    principal = await principals.load_principal(db, user_id)
     
-    if not user:
+    if not principal:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    if not principal.user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return principal
+
+async def get_current_user(
+    principal: principals.Principal = Depends(get_current_principal)
+) -> User:
+    return principal.user
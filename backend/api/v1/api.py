@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from api.v1.endpoints import auth, lawyers, locations, bookings, payments, consultations, chat, ai_assistant, reviews, notifications
+from api.v1.endpoints import auth, lawyers, locations, bookings, payments, consultations, chat, ai_assistant, reviews, notifications, uploads
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -12,3 +12,4 @@ api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
 api_router.include_router(ai_assistant.router, prefix="/ai", tags=["ai"])
 api_router.include_router(reviews.router, prefix="/reviews", tags=["reviews"])
 api_router.include_router(notifications.router, prefix="/notifications", tags=["notifications"])
+api_router.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
@@ -1,4 +1,4 @@
-from datetime import timedelta
+import uuid
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
@@ -7,11 +7,10 @@ from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 
 from api import deps
-from core import security
-from core.config import settings
+from core import principals, security, sessions
 from models.user import User
 from schemas.user import UserCreate, User as UserSchema
-from schemas.token import Token
+from schemas.token import Token, RefreshTokenRequest
 
 router = APIRouter()
 
@@ -28,7 +27,14 @@ async def login_access_token(
     result = await db.execute(query)
     user = result.scalar_one_or_none()
 
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+        )
+
+    verified, new_hash = await security.verify_and_update_password(form_data.password, user.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -36,15 +42,13 @@ async def login_access_token(
     
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+
+    if new_hash:
+        # Stored hash uses old cost parameters; upgrade it while we have the password
+        user.hashed_password = new_hash
+        await db.commit()
         
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    return {
-        "access_token": security.create_access_token(
-            user.id, expires_delta=access_token_expires
-        ),
-        "refresh_token": security.create_refresh_token(user.id),
-        "token_type": "bearer",
-    }
+    return await sessions.create_session(user.id)
 
 @router.post("/register", response_model=Token)
 async def register_user(
@@ -70,7 +74,7 @@ async def register_user(
         email=user_in.email,
         full_name=user_in.full_name,
         phone=user_in.phone,
-        hashed_password=security.get_password_hash(user_in.password),
+        hashed_password=await security.hash_password(user_in.password),
         user_type=user_in.user_type,
         is_active=True,
         is_verified=False # Pending verification
@@ -84,11 +88,53 @@ async def register_user(
         await db.rollback()
         raise HTTPException(status_code=400, detail="User creation failed")
 
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    return {
-        "access_token": security.create_access_token(
-            user.id, expires_delta=access_token_expires
-        ),
-        "refresh_token": security.create_refresh_token(user.id),
-        "token_type": "bearer",
-    }
+    return await sessions.create_session(user.id)
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    token_in: RefreshTokenRequest,
+    db: AsyncSession = Depends(deps.get_db)
+) -> Any:
+    """
+    Exchange a refresh token for a new access and refresh token.
+    The refresh token is single use: the returned one replaces it. No password check,
+    so long-lived clients stay signed in without repeated logins.
+    """
+    payload = sessions.decode_refresh_token(token_in.refresh_token)
+    user = await principals.load_user(db, uuid.UUID(payload.sub))
+    if not user or not user.is_active:
+        await sessions.revoke_session(payload.sid, payload.sub)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Session expired or revoked")
+    return await sessions.rotate_session(payload)
+
+@router.post("/logout")
+async def logout(
+    token_in: RefreshTokenRequest
+) -> Any:
+    """
+    End the session of a refresh token, including its access tokens.
+    """
+    payload = sessions.decode_refresh_token(token_in.refresh_token)
+    await sessions.revoke_session(payload.sid, payload.sub)
+    return {"success": True}
+
+@router.post("/logout/all")
+async def logout_all(
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    End every session of the current user, on all devices.
+    """
+    revoked = await sessions.revoke_user_sessions(current_user.id)
+    return {"success": True, "sessions": revoked}
+
+@router.get("/password-hasher")
+async def password_hasher_stats(
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Password hashing pool load: queue depth, rejections and average wait/run times.
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return security.password_hasher.stats()
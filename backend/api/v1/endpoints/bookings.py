@@ -1,14 +1,19 @@
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, AsyncIterator, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 import uuid
 import json
+import time
 from datetime import datetime, timedelta
 
 from api import deps
-from core import ai, payment as payment_core
+from core import ai, drafts, payment as payment_core
 from core.config import settings
+from core.pagination import fetch_page, NEXT_CURSOR_HEADER
+from core.principals import Principal
 from db.session import get_db
 from models.user import User
 from models.lawyer import Lawyer
@@ -16,59 +21,102 @@ from models.booking import Booking
 from schemas.booking import BookingCreate, BookingDraft, Booking as BookingSchema
 from schemas.payment import PaymentResponse
 
-# Using Redis for drafts (Mocking if Redis is not fully set up directly in code, but assuming dependency)
-from redis import asyncio as aioredis
-
 router = APIRouter()
 
-# Redis connection
-redis = aioredis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
+# ai_summary_status of a draft
+SUMMARY_PENDING = "pending"
+SUMMARY_READY = "ready"
+SUMMARY_FAILED = "failed"
+
+# Seconds between keep-alive comments on a summary event stream
+SSE_KEEPALIVE = 15
+
+def _draft_response(draft_id: str, draft: dict) -> dict:
+    return {
+        "booking_draft_id": draft_id,
+        "original_description": draft["original_description"],
+        "ai_summary": draft.get("ai_summary"),
+        "ai_summary_status": draft.get("ai_summary_status", SUMMARY_READY),
+        "lawyer_name": draft["lawyer_name"],
+        "consultation_fee": draft["consultation_fee"],
+        "expires_at": draft["expires_at"]
+    }
+
+async def _generate_draft_summary(draft_id: str, description: str, job: str):
+    """
+    Background half of /create: write the AI summary into the draft as Gemini streams
+    it, publishing each piece to /drafts/{id}/summary/stream listeners.
+    Stops if the draft expires or its summary is regenerated meanwhile (job changed).
+    """
+    draft_store = drafts.get_store()
+    this_job = {"ai_summary_job": job}
+    text = ""
+    try:
+        try:
+            async for chunk in ai.stream_case_summary(description):
+                offset, text = len(text), text + chunk
+                if not await draft_store.update(draft_id, {"ai_summary_partial": text}, expected=this_job):
+                    return
+                await draft_store.publish(draft_id, {"type": "chunk", "offset": offset, "text": chunk})
+            result = {"ai_summary": text.strip(), "ai_summary_status": SUMMARY_READY}
+        except Exception as e:
+            print(f"Error generating AI summary: {e}")
+            result = {"ai_summary": ai.summary_fallback(description), "ai_summary_status": SUMMARY_FAILED}
+
+        if await draft_store.update(draft_id, {**result, "ai_summary_job": None}, expected=this_job):
+            await draft_store.publish(draft_id, {"type": "done", **result})
+    except Exception as e:
+        print(f"Draft summary Error: {e}")
 
 @router.post("/create", response_model=BookingDraft)
 async def create_booking_draft(
     *,
     db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
-    booking_in: BookingCreate
+    booking_in: BookingCreate,
+    background_tasks: BackgroundTasks
 ) -> Any:
     """
-    Step 1: Create a booking draft with AI summary.
+    Step 1: Create a booking draft. Returns at once: unless this description was
+    summarized recently, `ai_summary_status` is "pending" and the AI summary follows
+    on /drafts/{id}/summary/stream (server-sent events) or by polling /drafts/{id}.
     """
-    # Verify lawyer exists
-    lawyer = await db.get(Lawyer, booking_in.lawyer_id)
+    # Verify lawyer exists (with the user, for the name)
+    lawyer = await db.get(Lawyer, booking_in.lawyer_id, options=[joinedload(Lawyer.user)])
     if not lawyer:
         raise HTTPException(status_code=404, detail="Lawyer not found")
 
-    # Generate AI Summary
-    ai_summary = await ai.generate_case_summary(booking_in.case_description)
+    # AI Summary: only if already known, otherwise generated in the background
+    ai_summary = await ai.cached_case_summary(booking_in.case_description)
+    summary_job = None if ai_summary is not None else uuid.uuid4().hex
     
-    # Store draft in Redis
+    # Store draft
     draft_id = str(uuid.uuid4())
-    expires_at = datetime.utcnow() + timedelta(minutes=15)
+    expires_at = datetime.utcnow() + timedelta(seconds=drafts.DRAFT_TTL)
     
     draft_data = {
         "user_id": str(current_user.id),
         "lawyer_id": str(lawyer.id),
-        "lawyer_name": lawyer.user.full_name, # Assuming relations logic
+        "lawyer_name": lawyer.user.full_name if lawyer.user else "Lawyer Name",
         "court_id": str(booking_in.court_id) if booking_in.court_id else None,
         "police_station_id": str(booking_in.police_station_id) if booking_in.police_station_id else None,
         "original_description": booking_in.case_description,
         "ai_summary": ai_summary,
+        "ai_summary_status": SUMMARY_READY if summary_job is None else SUMMARY_PENDING,
+        # Text received so far while pending; the job id lets a regenerate supersede it
+        "ai_summary_partial": "",
+        "ai_summary_job": summary_job,
+        "ai_summary_started_at": time.time() if summary_job else None,
         "consultation_fee": lawyer.consultation_fee,
         "preferred_time": booking_in.preferred_time.isoformat() if booking_in.preferred_time else None,
         "expires_at": expires_at.isoformat()
     }
     
-    await redis.setex(f"booking_draft:{draft_id}", 900, json.dumps(draft_data))
+    await drafts.get_store().create(draft_id, draft_data)
+    if summary_job:
+        background_tasks.add_task(_generate_draft_summary, draft_id, booking_in.case_description, summary_job)
     
-    return {
-        "booking_draft_id": draft_id,
-        "original_description": booking_in.case_description,
-        "ai_summary": ai_summary,
-        "lawyer_name": lawyer.user.full_name if lawyer.user else "Lawyer Name", # Need eager load usually
-        "consultation_fee": lawyer.consultation_fee,
-        "expires_at": expires_at
-    }
+    return _draft_response(draft_id, draft_data)
 
 @router.post("/confirm", response_model=PaymentResponse)
 async def confirm_booking(
@@ -81,13 +129,10 @@ async def confirm_booking(
     Step 2: Confirm draft and initiate payment.
     """
     # Fetch draft
-    draft_json = await redis.get(f"booking_draft:{booking_draft_id}")
-    if not draft_json:
-        raise HTTPException(status_code=404, detail="Booking draft expired or invalid")
-    
-    draft = json.loads(draft_json)
-    if draft["user_id"] != str(current_user.id):
-        raise HTTPException(status_code=403, detail="Not authorized")
+    draft_store = drafts.get_store()
+    draft = await _get_own_draft(booking_draft_id, current_user)
+    if draft.get("ai_summary_status") == SUMMARY_PENDING:
+        raise HTTPException(status_code=409, detail="AI summary is still being generated")
         
     # Calculate fees (in paise)
     consultation_fee = int(draft["consultation_fee"]) * 100
@@ -105,12 +150,9 @@ async def confirm_booking(
     # Strategy: Pass draft_id and order_id to client. Client pays. Client calls verify.
     # Verify endpoint retrieves draft again and creates booking.
     
-    # We update redis with order_id to link them logic
-    draft["razorpay_order_id"] = order_data["id"]
-    await redis.setex(f"booking_draft:{booking_draft_id}", 900, json.dumps(draft))
-    
-    # Store mapping for verification
-    await redis.setex(f"order_draft:{order_data['id']}", 900, booking_draft_id)
+    # Link the order to the draft (and map it back for verification) in one round trip
+    if not await draft_store.attach_order(booking_draft_id, order_data["id"]):
+        raise HTTPException(status_code=404, detail="Booking draft expired or invalid")
 
     return {
         "booking_id": "pending", # Not created yet
@@ -130,68 +172,179 @@ async def regenerate_summary(
     """
     Regenerate AI summary for a draft.
     """
-    draft_json = await redis.get(f"booking_draft:{booking_draft_id}")
-    if not draft_json:
+    draft_store = drafts.get_store()
+    draft = await draft_store.get(booking_draft_id)
+    if not draft:
         raise HTTPException(status_code=404, detail="Draft expired")
         
-    draft = json.loads(draft_json)
     if draft["user_id"] != str(current_user.id):
         raise HTTPException(status_code=403, detail="Not authorized")
         
     ai_summary = await ai.generate_case_summary(updated_description)
     
-    draft["original_description"] = updated_description
-    draft["ai_summary"] = ai_summary
-    
-    await redis.setex(f"booking_draft:{booking_draft_id}", 900, json.dumps(draft))
-    
-    return {
-        "booking_draft_id": booking_draft_id,
+    # Only these fields are written; the draft gets a fresh lifetime. Clearing the job
+    # stops a background summary still running for the previous description.
+    changed = {
         "original_description": updated_description,
         "ai_summary": ai_summary,
-        "lawyer_name": draft["lawyer_name"],
-        "consultation_fee": draft["consultation_fee"],
-        "expires_at": draft["expires_at"]
+        "ai_summary_status": SUMMARY_READY,
+        "ai_summary_job": None,
+        "expires_at": (datetime.utcnow() + timedelta(seconds=drafts.DRAFT_TTL)).isoformat(),
     }
+    if not await draft_store.update(booking_draft_id, changed, refresh_ttl=True):
+        raise HTTPException(status_code=404, detail="Draft expired")
+    draft.update(changed)
+    await draft_store.publish(booking_draft_id, {"type": "done", "ai_summary": ai_summary, "ai_summary_status": SUMMARY_READY})
+    
+    return _draft_response(booking_draft_id, draft)
+
+async def _settle_stale_summary(draft_id: str, draft: dict) -> Optional[dict]:
+    """
+    A summary pending for longer than SUMMARY_JOB_TIMEOUT lost its background task
+    (worker restarted or killed): mark it failed, with the fallback text, so the draft
+    can still be confirmed. Clearing the job also stops that task if it is merely slow.
+    Returns the draft as it now is (None if it expired).
+    """
+    if draft.get("ai_summary_status") != SUMMARY_PENDING:
+        return draft
+    if time.time() - (draft.get("ai_summary_started_at") or 0) < settings.SUMMARY_JOB_TIMEOUT:
+        return draft
+
+    draft_store = drafts.get_store()
+    result = {"ai_summary": ai.summary_fallback(draft["original_description"]), "ai_summary_status": SUMMARY_FAILED}
+    if await draft_store.update(draft_id, {**result, "ai_summary_job": None}, expected={"ai_summary_job": draft.get("ai_summary_job")}):
+        await draft_store.publish(draft_id, {"type": "done", **result})
+        return {**draft, **result, "ai_summary_job": None}
+    # Finished or regenerated meanwhile
+    return await draft_store.get(draft_id)
+
+async def _get_own_draft(booking_draft_id: str, current_user: User) -> dict:
+    draft = await drafts.get_store().get(booking_draft_id)
+    if not draft:
+        raise HTTPException(status_code=404, detail="Booking draft expired or invalid")
+    if draft["user_id"] != str(current_user.id):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    draft = await _settle_stale_summary(booking_draft_id, draft)
+    if not draft:
+        raise HTTPException(status_code=404, detail="Booking draft expired or invalid")
+    return draft
+
+@router.get("/drafts/{booking_draft_id}", response_model=BookingDraft)
+async def read_booking_draft(
+    booking_draft_id: str,
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Get a booking draft, e.g. to poll until `ai_summary_status` is no longer "pending".
+    """
+    return _draft_response(booking_draft_id, await _get_own_draft(booking_draft_id, current_user))
+
+def _sse(event: str, data: dict, event_id: int = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _sse_done(draft: dict) -> str:
+    return _sse("done", {"ai_summary": draft["ai_summary"], "ai_summary_status": draft.get("ai_summary_status", SUMMARY_READY)})
+
+async def _summary_events(booking_draft_id: str, sent: int, request: Request) -> AsyncIterator[str]:
+    draft_store = drafts.get_store()
+    async with draft_store.subscribe(booking_draft_id) as next_event:
+        # Read only once subscribed: text written before is in the draft, text written
+        # after arrives as events (possibly both, hence the offsets)
+        draft = await draft_store.get(booking_draft_id)
+        if not draft:
+            return
+        if draft.get("ai_summary_status") != SUMMARY_PENDING:
+            yield _sse_done(draft)
+            return
+        partial = draft.get("ai_summary_partial") or ""
+        if len(partial) > sent:
+            yield _sse("chunk", {"text": partial[sent:]}, len(partial))
+            sent = len(partial)
+
+        while not await request.is_disconnected():
+            event = await next_event(SSE_KEEPALIVE)
+            if event is None:
+                draft = await draft_store.get(booking_draft_id)
+                if draft:
+                    draft = await _settle_stale_summary(booking_draft_id, draft)
+                if not draft:
+                    return
+                # Pub/sub is at-most-once: catch up on missed events from the draft
+                if draft.get("ai_summary_status") != SUMMARY_PENDING:
+                    yield _sse_done(draft)
+                    return
+                partial = draft.get("ai_summary_partial") or ""
+                if len(partial) > sent:
+                    yield _sse("chunk", {"text": partial[sent:]}, len(partial))
+                    sent = len(partial)
+                else:
+                    yield ": keep-alive\n\n"
+            elif event["type"] == "done":
+                yield _sse("done", {"ai_summary": event["ai_summary"], "ai_summary_status": event["ai_summary_status"]})
+                return
+            else:
+                end = event["offset"] + len(event["text"])
+                if end > sent:
+                    yield _sse("chunk", {"text": event["text"][max(sent - event["offset"], 0):]}, end)
+                    sent = end
+
+@router.get("/drafts/{booking_draft_id}/summary/stream")
+async def stream_draft_summary(
+    booking_draft_id: str,
+    request: Request,
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Server-sent events with a draft's AI summary as it is written: `chunk` events
+    ({"text": ...}, id = characters sent so far) then one `done` event with the whole
+    summary and its status. Reconnecting with Last-Event-ID resumes where it stopped.
+    """
+    await _get_own_draft(booking_draft_id, current_user)
+    last_event_id = request.headers.get("last-event-id", "")
+    sent = int(last_event_id) if last_event_id.isdigit() else 0
+    return StreamingResponse(
+        _summary_events(booking_draft_id, sent, request),
+        media_type="text/event-stream",
+        # Proxies must not buffer the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/", response_model=list[BookingSchema])
 async def read_bookings(
+    response: Response,
     db: AsyncSession = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(deps.get_current_user),
+    skip: int = Query(0, ge=0, deprecated=True),
+    limit: int = Query(100, ge=1, le=100),
+    cursor: str | None = None,
+    principal: Principal = Depends(deps.get_current_principal),
     status: str | None = None
 ) -> Any:
     """
-    Retrieve bookings. 
+    Retrieve bookings, newest first. 
     Users see their own bookings.
     Lawyers see bookings where they are the lawyer.
+    Pass the X-Next-Cursor response header back as `cursor` to get the next page.
     """
+    current_user = principal.user
     if current_user.user_type == "lawyer":
-        # First get the lawyer profile id
-        # Assuming eager loaded or we query
-        # For optimization we rely on lazy load or separate query if needed, 
-        # but User model has backref 'lawyer_profile'
-        # Since relation is list (one-to-many? No, usually one-to-one but defined as list in backref sometimes, let's check model)
-        # Lawyer model: user_id unique=True.
-        # Check if lawyer profile exists
-        query = select(Lawyer).where(Lawyer.user_id == current_user.id)
-        result = await db.execute(query)
-        lawyer = result.scalar_one_or_none()
-        
-        if not lawyer:
+        # Lawyer profile id comes with the principal, no extra query
+        if not principal.lawyer_id:
             return [] # Or raise error
             
-        stmt = select(Booking).where(Booking.lawyer_id == lawyer.id)
+        stmt = select(Booking).where(Booking.lawyer_id == principal.lawyer_id)
     else:
         stmt = select(Booking).where(Booking.user_id == current_user.id)
         
     if status:
         stmt = stmt.where(Booking.status == status)
         
-    stmt = stmt.offset(skip).limit(limit).order_by(Booking.created_at.desc())
-    result = await db.execute(stmt)
-    bookings = result.scalars().all()
+    if skip and not cursor:
+        stmt = stmt.offset(skip)
+    sort_keys = [(Booking.created_at, True), (Booking.id, True)]
+    bookings, next_cursor = await fetch_page(db, stmt, sort_keys, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return bookings
 
 @router.get("/{booking_id}", response_model=BookingSchema)
@@ -199,7 +352,7 @@ async def read_booking(
     *,
     db: AsyncSession = Depends(deps.get_db),
     booking_id: uuid.UUID,
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Get booking by ID.
@@ -209,19 +362,7 @@ async def read_booking(
         raise HTTPException(status_code=404, detail="Booking not found")
         
     # Permission check
-    is_owner = booking.user_id == current_user.id
-    
-    # Check if lawyer
-    is_lawyer = False
-    if current_user.user_type == "lawyer":
-        query = select(Lawyer).where(Lawyer.user_id == current_user.id)
-        result = await db.execute(query)
-        lawyer_profile = result.scalar_one_or_none()
-        if lawyer_profile and lawyer_profile.id == booking.lawyer_id:
-            is_lawyer = True
-            
-    if not (is_owner or is_lawyer or current_user.is_superuser):
-        raise HTTPException(status_code=403, detail="Not authorized")
+    principal.ensure_booking_party(booking, allow_superuser=True)
         
     return booking
 
@@ -232,7 +373,7 @@ async def update_booking_status(
     booking_id: uuid.UUID,
     status_in: str, # accepted, rejected, cancelled
     reason: str | None = None,
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Update booking status (Lawyer: accept/reject, User: cancel).
@@ -242,12 +383,8 @@ async def update_booking_status(
         raise HTTPException(status_code=404, detail="Booking not found")
         
     # Lawyer Actions
-    if current_user.user_type == "lawyer":
-        query = select(Lawyer).where(Lawyer.user_id == current_user.id)
-        result = await db.execute(query)
-        lawyer_profile = result.scalar_one_or_none()
-        
-        if not lawyer_profile or lawyer_profile.id != booking.lawyer_id:
+    if principal.user.user_type == "lawyer":
+        if not principal.is_booking_lawyer(booking):
              raise HTTPException(status_code=403, detail="Not authorized")
              
         if status_in not in ["accepted", "rejected", "rescheduled"]:
@@ -258,7 +395,7 @@ async def update_booking_status(
             booking.cancellation_reason = reason # Using this field for notes generically for now
             
     # User Actions
-    elif current_user.id == booking.user_id:
+    elif principal.is_booking_client(booking):
         if status_in not in ["cancelled"]:
              raise HTTPException(status_code=400, detail="User can only cancel")
         
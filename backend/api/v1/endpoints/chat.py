@@ -1,5 +1,5 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Query
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import uuid
@@ -7,6 +7,8 @@ import json
 from datetime import datetime
 
 from api import deps
+from core.pagination import fetch_page, NEXT_CURSOR_HEADER
+from core.principals import Principal
 from core.websocket import manager
 from db.session import get_db
 from models.user import User
@@ -29,34 +31,32 @@ class MessageSchema(BaseModel):
 @router.get("/history/{booking_id}", response_model=List[MessageSchema])
 async def get_chat_history(
     booking_id: uuid.UUID,
+    response: Response,
     db: AsyncSession = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
-    skip: int = 0,
-    limit: int = 50
+    principal: Principal = Depends(deps.get_current_principal),
+    skip: int = Query(0, ge=0, deprecated=True),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None
 ) -> Any:
     """
-    Get chat history for a booking.
+    Get chat history for a booking, oldest first.
+    Pass the X-Next-Cursor response header back as `cursor` to get the next page.
     """
     booking = await db.get(Booking, booking_id)
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
         
     # Permission check
-    is_authorized = (booking.user_id == current_user.id) or (booking.lawyer_id == current_user.lawyer_profile[0].id if current_user.lawyer_profile else False)
-    # Note: lawyer_profile is list in User model backref
-    if not is_authorized and current_user.user_type == 'lawyer':
-         # Stricter check
-         pass
-         
-    if booking.user_id != current_user.id:
-         # Check lawyer relation
-         # We can improve this permission logic reuse
-         pass
+    principal.ensure_booking_party(booking, allow_superuser=True)
          
     # Fetch messages
-    stmt = select(Message).where(Message.booking_id == booking_id).order_by(Message.timestamp.asc()).offset(skip).limit(limit)
-    result = await db.execute(stmt)
-    messages = result.scalars().all()
+    stmt = select(Message).where(Message.booking_id == booking_id)
+    if skip and not cursor:
+        stmt = stmt.offset(skip)
+    sort_keys = [(Message.timestamp, False), (Message.id, False)]
+    messages, next_cursor = await fetch_page(db, stmt, sort_keys, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return messages
 
 @router.websocket("/ws/{booking_id}")
@@ -8,9 +8,9 @@ from datetime import datetime
 from api import deps
 from core import agora
 from core.config import settings
+from core.principals import Principal
 from db.session import get_db
 from models.user import User
-from models.lawyer import Lawyer
 from models.booking import Booking
 from models.consultation import Consultation
 from pydantic import BaseModel
@@ -27,7 +27,7 @@ class ConsultationResponse(BaseModel):
 async def start_consultation(
     booking_id: uuid.UUID,
     db: AsyncSession = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user)
+    principal: Principal = Depends(deps.get_current_principal)
 ) -> Any:
     """
     Start a consultation session.
@@ -38,18 +38,7 @@ async def start_consultation(
          raise HTTPException(status_code=404, detail="Booking not found")
          
     # Auth Check
-    is_lawyer = False
-    if current_user.user_type == "lawyer":
-        query = select(Lawyer).where(Lawyer.user_id == current_user.id)
-        result = await db.execute(query)
-        lawyer_profile = result.scalar_one_or_none()
-        if lawyer_profile and lawyer_profile.id == booking.lawyer_id:
-            is_lawyer = True
-            
-    is_user = booking.user_id == current_user.id
-    
-    if not (is_user or is_lawyer):
-        raise HTTPException(status_code=403, detail="Not authorized")
+    principal.ensure_booking_party(booking)
         
     if booking.status not in ["accepted", "rescheduled"]:
          raise HTTPException(status_code=400, detail="Booking not confirmed yet")
@@ -78,7 +67,7 @@ async def start_consultation(
              pass 
     
     # Generate Token
-    token = agora.generate_agora_token(channel_name, str(current_user.id))
+    token = agora.generate_agora_token(channel_name, str(principal.user.id))
     
     return {
         "consultation_id": consultation.id,
@@ -91,7 +80,7 @@ async def start_consultation(
 async def end_consultation(
     consultation_id: uuid.UUID,
     db: AsyncSession = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user)
+    principal: Principal = Depends(deps.get_current_principal)
 ) -> Any:
     """
     End a consultation.
@@ -100,7 +89,9 @@ async def end_consultation(
     if not consultation:
         raise HTTPException(status_code=404, detail="Consultation not found")
         
-    # Logic to verify user permission...
+    booking = await db.get(Booking, consultation.booking_id)
+    if booking:
+        principal.ensure_booking_party(booking)
     
     consultation.status = "completed"
     consultation.ended_at = datetime.utcnow()
@@ -112,7 +103,6 @@ async def end_consultation(
     db.add(consultation)
     
     # Also update booking status
-    booking = await db.get(Booking, consultation.booking_id)
     if booking:
         booking.status = "completed"
         booking.completed_at = datetime.utcnow()
@@ -1,137 +1,451 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Request, Response
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy import select, insert, update, and_, or_, func
+from sqlalchemy.exc import IntegrityError
+import asyncio
 import json
+import uuid
+from datetime import datetime, timedelta, timezone
 
 from api import deps
-from core import storage
+from core import storage, search, cache, ingest, principals
+from core.config import settings
+from core.lawyers import (
+    lawyer_load_options, get_lawyer, load_lawyers, find_missing_references, apply_verification_decisions,
+    generate_photo_derivatives
+)
+from core.matching import matcher
+from core.pagination import fetch_page, NEXT_CURSOR_HEADER
+from db.session import AsyncSessionLocal
 from models.user import User
 from models.lawyer import Lawyer, LawyerCourt, LawyerSpecialization
 from models.location import Court
 from models.specialization import Specialization
-from schemas.lawyer import Lawyer as LawyerSchema, LawyerCreate
+from schemas.lawyer import (
+    Lawyer as LawyerSchema, LawyerCreate, LawyerSpecializationCreate, LawyerSearchFacets,
+    LawyerMatch, LawyerMatchRequest, LawyerBulkVerify, LawyerVerificationOutcome,
+    LawyerDocumentUploadRequest, LawyerDocumentUpload, LawyerDocumentComplete, LawyerRegistrationForm
+)
 from schemas.user import User as UserSchema
 
 router = APIRouter()
 
-@router.post("/register", response_model=LawyerSchema)
+# Document kind -> (Lawyer column, accepted content types)
+DOCUMENT_KINDS = {
+    "bar_council_certificate": ("bar_council_certificate_url", {"application/pdf", "image/jpeg", "image/png"}),
+    "id_proof": ("id_proof_url", {"application/pdf", "image/jpeg", "image/png"}),
+    "profile_photo": ("profile_photo_url", {"image/jpeg", "image/png", "image/webp"}),
+}
+# Identity documents are only for admins and the lawyer; public responses carry the photo alone
+DOCUMENT_FIELDS = ("bar_council_certificate_url", "id_proof_url")
+PHOTO_FIELDS = ("profile_photo_url", "profile_photo_thumb_url", "profile_photo_card_url")
+
+def _with_file_urls(lawyers: list, include_documents: bool = False) -> List[dict]:
+    """
+    Serialize lawyers (ORM objects or cached dicts) with their stored file keys replaced
+    by links, signing the whole page in one batch. Document fields are signed only with
+    include_documents (admin and owner responses), and are null otherwise.
+    """
+    items = [
+        lawyer if isinstance(lawyer, dict) else LawyerSchema.model_validate(lawyer).model_dump(mode="json")
+        for lawyer in lawyers
+    ]
+    fields = PHOTO_FIELDS + DOCUMENT_FIELDS if include_documents else PHOTO_FIELDS
+    urls = storage.generate_file_urls(item[field] for item in items for field in fields)
+    for item in items:
+        for field in fields:
+            if item[field]:
+                item[field] = urls[item[field]]
+        if not include_documents:
+            item.update(dict.fromkeys(DOCUMENT_FIELDS))
+    return items
+
+def _upload_directory(user_id, kind: str) -> str:
+    # The kind is part of the signed key, so an upload cannot be recorded as another document
+    return f"lawyers/uploads/{user_id}/{kind}"
+
+async def _confirm_document(user_id, kind: str, key: str) -> str:
+    """
+    Check a direct upload belongs to the user, was issued for this document kind and has
+    arrived; returns the value to store.
+    """
+    if not key.startswith(_upload_directory(user_id, kind) + "/") or ".." in key:
+        raise HTTPException(status_code=400, detail="Unknown upload key")
+    stored = await storage.get_backend().confirm_upload(key)
+    if not stored:
+        raise HTTPException(status_code=400, detail="Upload not found, finish uploading the file first")
+    return stored
+
+# Per-field limits for documents sent inline to /register
+DOCUMENT_FILE_RULES = {
+    kind: ingest.FileRule(
+        settings.PROFILE_PHOTO_MAX_BYTES if kind == "profile_photo" else settings.UPLOAD_MAX_BYTES, content_types
+    )
+    for kind, (_, content_types) in DOCUMENT_KINDS.items()
+}
+
+def _registration_openapi() -> dict:
+    # /register reads its body itself, so describe the form for the docs
+    schema = LawyerRegistrationForm.model_json_schema()
+    for kind in DOCUMENT_KINDS:
+        schema["properties"][kind] = {"type": "string", "format": "binary"}
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": schema}}}}
+
+async def _process_profile_photo(lawyer_id, photo_key: str) -> None:
+    """
+    Background task: thumbnails for a newly uploaded profile photo.
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            updated = await generate_photo_derivatives(db, lawyer_id, photo_key)
+            await db.commit()
+        if updated:
+            await search.invalidate_search_cache()
+    except Exception as e:
+        print(f"Profile photo processing error for lawyer {lawyer_id}: {e}")
+
+@router.post("/register", response_model=LawyerSchema, openapi_extra=_registration_openapi())
 async def register_lawyer(
-    *,
+    request: Request,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
-    bar_council_number: str = Form(...),
-    years_experience: int = Form(...),
-    education: Optional[str] = Form(None),
-    bio: Optional[str] = Form(None),
-    languages: str = Form(...), # JSON string list
-    consultation_fee: int = Form(...),
-    court_ids: str = Form(...), # JSON string list of UUIDs
-    specializations: str = Form(...), # JSON string list of objects
-    bar_council_certificate: UploadFile = File(...),
-    id_proof: UploadFile = File(...),
-    profile_photo: UploadFile = File(None)
+    current_user: User = Depends(deps.get_current_user)
 ):
     """
-    Register a new lawyer profile.
+    Register a new lawyer profile (multipart/form-data, fields of LawyerRegistrationForm).
+    Each document is either sent with this request or uploaded beforehand through
+    /documents/upload, passing the returned key (preferred: the file skips the API).
+    Sent documents are streamed to storage as they arrive (core.ingest), with size
+    limits and type checks applied while reading.
     """
-    # Check if user already has a lawyer profile
-    query = select(Lawyer).where(Lawyer.user_id == current_user.id)
+    # Check if user already has a lawyer profile (before reading the body)
+    query = select(Lawyer.id).where(Lawyer.user_id == current_user.id)
     result = await db.execute(query)
     if result.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="Lawyer profile already exists")
+    # End the transaction so no pooled connection is held while a slow client uploads.
+    # Commit rather than rollback: nothing was written, and with expire_on_commit=False
+    # current_user stays loaded (a rollback would expire it and force a reload).
+    await db.commit()
 
-    # Upload files
-    cert_url = await storage.upload_file_to_s3(bar_council_certificate, f"lawyers/{current_user.id}/documents")
-    id_proof_url = await storage.upload_file_to_s3(id_proof, f"lawyers/{current_user.id}/documents")
-    photo_url = None
-    if profile_photo:
-        photo_url = await storage.upload_file_to_s3(profile_photo, f"lawyers/{current_user.id}/documents")
+    upload = await ingest.receive_multipart(request, DOCUMENT_FILE_RULES)
+    try:
+        return await _register_lawyer(db, current_user, background_tasks, upload)
+    finally:
+        # Drops whatever was received but not published (e.g. validation failed)
+        await upload.abort()
 
-    # Create Lawyer
+async def _register_lawyer(
+    db: AsyncSession, current_user: User, background_tasks: BackgroundTasks, upload: ingest.MultipartUpload
+):
     try:
-        languages_list = json.loads(languages)
-        court_ids_list = json.loads(court_ids)
-        specs_list = json.loads(specializations)
-    except json.JSONDecodeError:
+        form = LawyerRegistrationForm(**upload.fields)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=json.loads(e.json()))
+
+    documents = [
+        ("bar_council_certificate", upload.files.get("bar_council_certificate"), form.bar_council_certificate_key),
+        ("id_proof", upload.files.get("id_proof"), form.id_proof_key),
+        ("profile_photo", upload.files.get("profile_photo"), form.profile_photo_key),
+    ]
+    if not all(file or key for _, file, key in documents[:2]):
+        raise HTTPException(status_code=400, detail="Bar council certificate and ID proof are required")
+
+    # Parse and validate list fields before publishing anything
+    try:
+        languages_list = search.normalize_languages(json.loads(form.languages)) or []
+        court_ids_list = list(dict.fromkeys(uuid.UUID(str(c)) for c in json.loads(form.court_ids)))
+        specs_list = [LawyerSpecializationCreate(**s) for s in json.loads(form.specializations)]
+    except (json.JSONDecodeError, ValueError, TypeError):
         raise HTTPException(status_code=400, detail="Invalid JSON format for list fields")
 
-    lawyer = Lawyer(
-        user_id=current_user.id,
-        bar_council_number=bar_council_number,
-        years_experience=years_experience,
-        education=education,
-        bio=bio,
-        languages=languages_list,
-        consultation_fee=consultation_fee,
-        bar_council_certificate_url=cert_url,
-        id_proof_url=id_proof_url,
-        profile_photo_url=photo_url,
-        verification_status="pending_verification"
+    spec_ids = {s.specialization_id for s in specs_list}
+    spec_ids.update(s.sub_specialization_id for s in specs_list if s.sub_specialization_id)
+    missing_courts, missing_specs = await find_missing_references(db, court_ids_list, spec_ids)
+    if missing_courts or missing_specs:
+        raise HTTPException(status_code=400, detail={
+            "unknown_court_ids": [str(i) for i in missing_courts],
+            "unknown_specialization_ids": [str(i) for i in missing_specs],
+        })
+
+    # Publish files concurrently: latency is the slowest single commit, not the sum.
+    # Keys are content-addressed, so a document uploaded again (e.g. on a retry) is stored once.
+    directory = "lawyers/documents"
+
+    async def store_document(kind: str, file: Optional[ingest.IngestedFile], key: Optional[str]) -> Optional[str]:
+        if key:
+            return await _confirm_document(current_user.id, kind, key)
+        if file:
+            return await file.commit(directory)
+        return None
+
+    cert_url, id_proof_url, photo_url = await asyncio.gather(
+        *(store_document(kind, file, key) for kind, file, key in documents)
     )
-    db.add(lawyer)
-    await db.commit()
-    await db.refresh(lawyer)
-
-    # Add Courts
-    for c_id in court_ids_list:
-        lc = LawyerCourt(lawyer_id=lawyer.id, court_id=c_id)
-        db.add(lc)
-
-    # Add Specializations
-    for s in specs_list:
-        ls = LawyerSpecialization(
-            lawyer_id=lawyer.id, 
-            specialization_id=s['specialization_id'],
-            sub_specialization_id=s.get('sub_specialization_id')
-        )
-        db.add(ls)
-    
-    await db.commit()
-    await db.refresh(lawyer)
-    
-    # Update user type
-    current_user.user_type = "lawyer"
-    db.add(current_user)
+
+    # One transaction with a fixed number of statements, however many courts/specializations
+    lawyer_id = uuid.uuid4()
+    try:
+        await db.execute(insert(Lawyer).values(
+            id=lawyer_id,
+            user_id=current_user.id,
+            bar_council_number=form.bar_council_number,
+            years_experience=form.years_experience,
+            education=form.education,
+            bio=form.bio,
+            languages=languages_list,
+            consultation_fee=form.consultation_fee,
+            bar_council_certificate_url=cert_url,
+            id_proof_url=id_proof_url,
+            profile_photo_url=photo_url,
+            verification_status="pending_verification"
+        ))
+        if court_ids_list:
+            await db.execute(insert(LawyerCourt), [
+                {"lawyer_id": lawyer_id, "court_id": c_id} for c_id in court_ids_list
+            ])
+        if specs_list:
+            await db.execute(insert(LawyerSpecialization), [
+                {
+                    "lawyer_id": lawyer_id,
+                    "specialization_id": s.specialization_id,
+                    "sub_specialization_id": s.sub_specialization_id,
+                }
+                for s in {(s.specialization_id, s.sub_specialization_id): s for s in specs_list}.values()
+            ])
+
+        # Index the new profile for search (name, courts and specializations are now in place)
+        await search.refresh_search_documents(db, [lawyer_id])
+        await search.refresh_lawyer_locations(db, [lawyer_id])
+
+        # Update user type
+        await db.execute(update(User).where(User.id == current_user.id).values(user_type="lawyer"))
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Lawyer registration failed (duplicate bar council number?)")
+    # Cached principal still says user_type "user"
+    await principals.invalidate(current_user.id)
+
+    if photo_url:
+        background_tasks.add_task(_process_profile_photo, lawyer_id, photo_url)
+    return _with_file_urls([await get_lawyer(db, lawyer_id)], include_documents=True)[0]
+
+@router.post("/documents/upload", response_model=LawyerDocumentUpload)
+async def create_document_upload(
+    upload_in: LawyerDocumentUploadRequest,
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Direct upload, step 1: parameters for sending a document straight to storage
+    (S3 presigned POST, signed Cloudinary params or a signed local PUT), so the file
+    never passes through an API worker.
+    Then call /documents/complete with the key, or pass it to /register.
+    """
+    _, content_types = DOCUMENT_KINDS[upload_in.kind]
+    if upload_in.content_type not in content_types:
+        raise HTTPException(status_code=415, detail=f"Unsupported file type {upload_in.content_type}")
+    if upload_in.size > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"File larger than {settings.UPLOAD_MAX_BYTES} bytes")
+
+    key = storage.upload_key(_upload_directory(current_user.id, upload_in.kind), upload_in.filename)
+    params = storage.get_backend().presign_upload(
+        key, upload_in.content_type, upload_in.size, settings.UPLOAD_URL_TTL
+    )
+    return {
+        "key": key,
+        **params,
+        "expires_at": datetime.now(timezone.utc) + timedelta(seconds=settings.UPLOAD_URL_TTL),
+    }
+
+@router.post("/documents/complete", response_model=LawyerSchema)
+async def complete_document_upload(
+    complete_in: LawyerDocumentComplete,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Direct upload, step 2: record an uploaded document on the lawyer's profile.
+    A new bar council certificate or ID proof sends the profile back to verification.
+    """
+    column, _ = DOCUMENT_KINDS[complete_in.kind]
+    stored = await _confirm_document(current_user.id, complete_in.kind, complete_in.key)
+    values = {column: stored}
+    reverify = column in DOCUMENT_FIELDS
+    if reverify:
+        values.update(verification_status="pending_verification", verified_at=None, verified_by=None)
+    else:
+        # The old thumbnails no longer match; new ones are rendered in the background
+        values.update(profile_photo_thumb_url=None, profile_photo_card_url=None)
+
+    result = await db.execute(
+        update(Lawyer)
+        .where(Lawyer.user_id == current_user.id)
+        .values(values)
+        .returning(Lawyer.id)
+    )
+    lawyer_id = result.scalar_one_or_none()
+    if lawyer_id is None:
+        raise HTTPException(status_code=404, detail="Lawyer profile not found, pass the key to /register instead")
+    if reverify:
+        await db.execute(update(User).where(User.id == current_user.id).values(is_verified=False))
     await db.commit()
-    
-    return lawyer
+    await search.invalidate_search_cache()
+    if reverify:
+        # No longer verified: out of /match, and the cached principal says is_verified
+        await matcher.remove(lawyer_id)
+        await principals.invalidate(current_user.id)
+
+    if complete_in.kind == "profile_photo":
+        background_tasks.add_task(_process_profile_photo, lawyer_id, stored)
+
+    return _with_file_urls([await get_lawyer(db, lawyer_id)], include_documents=True)[0]
 
 @router.get("/search", response_model=List[LawyerSchema])
 async def search_lawyers(
+    response: Response,
     db: AsyncSession = Depends(deps.get_db),
     query: Optional[str] = None,
     specialization_id: Optional[str] = None,
     court_id: Optional[str] = None,
+    state_id: Optional[str] = None,
+    district_id: Optional[str] = None,
     min_price: Optional[int] = None,
     max_price: Optional[int] = None,
-    limit: int = 20,
-    skip: int = 0
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    min_experience: Optional[int] = Query(None, ge=0),
+    languages: Optional[List[str]] = Query(None),
+    languages_match: str = Query("any", regex="^(any|all)$"),
+    sort_by: str = Query("relevance", regex="^(relevance|newest|rating|experience)$"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0, deprecated=True)
 ):
     """
     Search lawyers with filters.
+    Pass the X-Next-Cursor response header back as `cursor` to get the next page.
+    Responses are cached per normalized filter set until search data changes.
     """
-    stmt = select(Lawyer).where(Lawyer.verification_status == "verified")
+    query = search.normalize_query(query)
+    key = await search.search_cache_key("results", {
+        "query": query,
+        "specialization_id": specialization_id,
+        "court_id": court_id,
+        "state_id": state_id,
+        "district_id": district_id,
+        "min_price": min_price,
+        "max_price": max_price,
+        "min_rating": min_rating,
+        "min_experience": min_experience,
+        "languages": search.normalize_languages(languages),
+        "languages_match": languages_match if languages else None,
+        "sort_by": sort_by,
+        "limit": limit,
+        "cursor": cursor,
+        "skip": skip or None,
+    })
+    cached = await cache.get_json(key)
+    if cached is not None:
+        if cached["next_cursor"]:
+            response.headers[NEXT_CURSOR_HEADER] = cached["next_cursor"]
+        return _with_file_urls(cached["items"])
 
-    if query:
-        stmt = stmt.where(or_(
-            Lawyer.bio.ilike(f"%{query}%"),
-            # Add join with User to search by name if needed
-        ))
-    if min_price:
-        stmt = stmt.where(Lawyer.consultation_fee >= min_price)
-    if max_price:
-        stmt = stmt.where(Lawyer.consultation_fee <= max_price)
-    
-    # Add joins for complex filters (court, specialization)
-    if court_id:
-        stmt = stmt.join(LawyerCourt).where(LawyerCourt.court_id == court_id)
-    if specialization_id:
-        stmt = stmt.join(LawyerSpecialization).where(LawyerSpecialization.specialization_id == specialization_id)
-
-    stmt = stmt.offset(skip).limit(limit)
-    result = await db.execute(stmt)
-    return result.scalars().all()
+    filters = search.lawyer_filters(
+        query=query,
+        specialization_id=specialization_id,
+        court_id=court_id,
+        state_id=state_id,
+        district_id=district_id,
+        min_price=min_price,
+        max_price=max_price,
+        min_rating=min_rating,
+        min_experience=min_experience,
+        languages=languages,
+        languages_match=languages_match,
+    )
+    stmt = select(Lawyer).where(*filters).options(*lawyer_load_options())
+    sort_keys = search.sort_keys(sort_by, query)
+
+    if skip and not cursor:
+        stmt = stmt.offset(skip)
+    lawyers, next_cursor = await fetch_page(db, stmt, sort_keys, cursor, limit)
+    # Cached with stored keys; links are signed per response so they never outlive the cache
+    items = [
+        {**LawyerSchema.model_validate(lawyer).model_dump(mode="json"), **dict.fromkeys(DOCUMENT_FIELDS)}
+        for lawyer in lawyers
+    ]
+    await cache.set_json(key, {"items": items, "next_cursor": next_cursor}, settings.SEARCH_CACHE_TTL)
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return _with_file_urls(items)
+
+@router.get("/search/facets", response_model=LawyerSearchFacets)
+async def search_lawyer_facets(
+    db: AsyncSession = Depends(deps.get_db),
+    query: Optional[str] = None,
+    specialization_id: Optional[str] = None,
+    court_id: Optional[str] = None,
+    state_id: Optional[str] = None,
+    district_id: Optional[str] = None,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    min_experience: Optional[int] = Query(None, ge=0),
+    languages: Optional[List[str]] = Query(None),
+    languages_match: str = Query("any", regex="^(any|all)$")
+):
+    """
+    Facet counts (specialization, court, language, fee range) for a search.
+    Takes the same filters as /search and answers in one aggregated query, cached briefly.
+    """
+    params = {
+        "specialization_id": specialization_id,
+        "court_id": court_id,
+        "state_id": state_id,
+        "district_id": district_id,
+        "min_price": min_price,
+        "max_price": max_price,
+        "min_rating": min_rating,
+        "min_experience": min_experience,
+        "languages": search.normalize_languages(languages),
+        "languages_match": languages_match if languages else None,
+    }
+    query = search.normalize_query(query)
+    key = await search.search_cache_key("facets", {**params, "query": query})
+    cached = await cache.get_json(key)
+    if cached is not None:
+        return cached
+
+    filters = search.lawyer_filters(query=query, **params)
+    facets = await search.compute_facets(db, filters)
+    await cache.set_json(key, facets, settings.SEARCH_FACETS_CACHE_TTL)
+    return facets
+
+@router.post("/match", response_model=List[LawyerMatch])
+async def match_lawyers(
+    match_in: LawyerMatchRequest,
+    db: AsyncSession = Depends(deps.get_db)
+):
+    """
+    Suggest verified lawyers for a free-text case description, best match first.
+    Ranked by the local vector index (core.matching), fast enough to call while the user types.
+    """
+    ranked = await matcher.query(match_in.description, top_k=match_in.top_k)
+    if not ranked:
+        return []
+
+    lawyers = await load_lawyers(db, [lawyer_id for lawyer_id, _ in ranked])
+    verified = [lawyer for lawyer in lawyers if lawyer.verification_status == "verified"]
+    by_id = {item["id"]: item for item in _with_file_urls(verified)}
+    return [
+        {"score": round(score, 4), "lawyer": by_id[lawyer_id]}
+        for lawyer_id, score in ranked
+        if lawyer_id in by_id
+    ]
 
 @router.get("/pending", response_model=List[LawyerSchema])
 async def get_pending_lawyers(
@@ -145,12 +459,56 @@ async def get_pending_lawyers(
     if not current_user.is_superuser:
          raise HTTPException(status_code=403, detail="Not authorized")
 
-    result = await db.execute(select(Lawyer).where(Lawyer.verification_status == "pending_verification"))
-    return result.scalars().all()
+    result = await db.execute(
+        select(Lawyer)
+        .where(Lawyer.verification_status == "pending_verification")
+        .options(*lawyer_load_options())
+    )
+    return _with_file_urls(result.scalars().all(), include_documents=True)
+
+async def _after_verification(db: AsyncSession, outcomes: dict) -> None:
+    """
+    Propagate committed verification decisions to the search cache, match index and
+    cached principals.
+    """
+    await search.invalidate_search_cache()
+    approved = [i for i, status in outcomes.items() if status == "approved"]
+    rejected = [i for i, status in outcomes.items() if status == "rejected"]
+    # Only verified lawyers are suggested by /match
+    if approved:
+        lawyers = await load_lawyers(db, approved)
+        await matcher.upsert_lawyers(lawyers)
+        # Their users are now is_verified
+        await principals.invalidate(*(lawyer.user_id for lawyer in lawyers))
+    if rejected:
+        await matcher.remove_many(rejected)
+
+@router.post("/verify/bulk", response_model=List[LawyerVerificationOutcome])
+async def verify_lawyers_bulk(
+    verify_in: LawyerBulkVerify,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Approve or reject many lawyers at once (Admin only).
+    All decisions are applied in one transaction; returns the outcome per lawyer ID.
+    """
+    if not current_user.is_superuser:
+         raise HTTPException(status_code=403, detail="Not authorized")
+
+    outcomes = await apply_verification_decisions(
+        db,
+        [(d.lawyer_id, d.action, d.reason) for d in verify_in.decisions],
+        verified_by=current_user.id,
+    )
+    await db.commit()
+    await _after_verification(db, outcomes)
+
+    return [{"lawyer_id": lawyer_id, "status": status} for lawyer_id, status in outcomes.items()]
 
 @router.post("/{lawyer_id}/verify", response_model=LawyerSchema)
 async def verify_lawyer(
-    lawyer_id: str,
+    lawyer_id: uuid.UUID,
     action: str = Query(..., regex="^(approve|reject)$"),
     reason: Optional[str] = None,
     db: AsyncSession = Depends(deps.get_db),
@@ -162,23 +520,10 @@ async def verify_lawyer(
     if not current_user.is_superuser:
          raise HTTPException(status_code=403, detail="Not authorized")
 
-    lawyer = await db.get(Lawyer, lawyer_id)
-    if not lawyer:
+    outcomes = await apply_verification_decisions(db, [(lawyer_id, action, reason)], verified_by=current_user.id)
+    if outcomes[str(lawyer_id)] == "not_found":
         raise HTTPException(status_code=404, detail="Lawyer not found")
 
-    if action == "approve":
-        from datetime import datetime
-        lawyer.verification_status = "verified"
-        lawyer.verified_at = datetime.utcnow()
-        lawyer.verified_by = current_user.id
-        lawyer.user.is_verified = True # Update User level flag too
-    else:
-        lawyer.verification_status = "rejected"
-        lawyer.rejection_reason = reason
-
     await db.commit()
-    await db.refresh(lawyer)
-    return lawyer
-
-# Helper to generate signed URLs for response
-# Ideally, we should intercept response and sign URLs, or sign them on retrieval
+    await _after_verification(db, outcomes)
+    return _with_file_urls([await get_lawyer(db, lawyer_id)], include_documents=True)[0]
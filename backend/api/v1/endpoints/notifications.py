@@ -1,5 +1,5 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 import uuid
@@ -7,6 +7,7 @@ from pydantic import BaseModel
 from datetime import datetime
 
 from api import deps
+from core.pagination import fetch_page, NEXT_CURSOR_HEADER
 from db.session import get_db
 from models.user import User
 from models.notification import Notification
@@ -25,17 +26,24 @@ class NotificationResponse(BaseModel):
 
 @router.get("/", response_model=List[NotificationResponse])
 async def get_notifications(
+    response: Response,
     db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
-    skip: int = 0,
-    limit: int = 20
+    skip: int = Query(0, ge=0, deprecated=True),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None
 ) -> Any:
     """
-    Get current user's notifications.
+    Get current user's notifications, newest first.
+    Pass the X-Next-Cursor response header back as `cursor` to get the next page.
     """
-    stmt = select(Notification).where(Notification.user_id == current_user.id).order_by(Notification.created_at.desc()).offset(skip).limit(limit)
-    result = await db.execute(stmt)
-    notifications = result.scalars().all()
+    stmt = select(Notification).where(Notification.user_id == current_user.id)
+    if skip and not cursor:
+        stmt = stmt.offset(skip)
+    sort_keys = [(Notification.created_at, True), (Notification.id, True)]
+    notifications, next_cursor = await fetch_page(db, stmt, sort_keys, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return notifications
 
 @router.patch("/{notification_id}/read", response_model=NotificationResponse)
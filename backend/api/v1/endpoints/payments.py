@@ -1,11 +1,13 @@
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 import json
 import uuid
 
 from api import deps
-from core import payment as payment_core
+from core import drafts, payment as payment_core
 from core.config import settings
 from db.session import get_db
 from models.booking import Booking, BookingHistory
@@ -13,11 +15,7 @@ from models.payment import Payment, Escrow
 from models.user import User
 from schemas.payment import PaymentVerify
 
-# Using Redis
-from redis import asyncio as aioredis
-
 router = APIRouter()
-redis = aioredis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
 
 @router.post("/verify")
 async def verify_payment(
@@ -37,19 +35,49 @@ async def verify_payment(
     ):
         raise HTTPException(status_code=400, detail="Invalid signature")
 
-    # 2. Retrieve Draft
-    draft_id = await redis.get(f"order_draft:{payment_in.razorpay_order_id}")
-    if not draft_id:
-         # Fallback: Check if payment already recorded?
-         # For now error
-         raise HTTPException(status_code=400, detail="Order not found or expired")
+    # 2. Take the draft: removed in the same step, so a payment verified twice
+    # concurrently creates one booking
+    draft_store = drafts.get_store()
+    taken = await draft_store.take_by_order(payment_in.razorpay_order_id)
+    if not taken:
+        # Verified before (a retry or a duplicate callback): same answer again
+        booking_id = await _recorded_booking_id(db, payment_in.razorpay_order_id)
+        if booking_id is None:
+            raise HTTPException(status_code=400, detail="Order not found or expired")
+        return {"success": True, "booking_id": str(booking_id)}
     
-    draft_json = await redis.get(f"booking_draft:{draft_id}")
-    if not draft_json:
+    draft_id, draft = taken
+    if not draft:
         raise HTTPException(status_code=400, detail="Booking details expired")
-        
-    draft = json.loads(draft_json)
     
+    try:
+        booking_id = await _create_paid_booking(db, payment_in, draft)
+    except IntegrityError:
+        await db.rollback()
+        # payments.razorpay_order_id is unique: a booking for this order already exists
+        # (e.g. this draft was restored after a request cancelled past its commit)
+        booking_id = await _recorded_booking_id(db, payment_in.razorpay_order_id)
+        if booking_id is None:
+            await draft_store.restore(draft_id, payment_in.razorpay_order_id, draft)
+            raise
+    except BaseException:
+        # Keep the draft so verification can be retried. Also on cancellation, which may
+        # come after the commit: the retry then finds the booking through the order id.
+        await draft_store.restore(draft_id, payment_in.razorpay_order_id, draft)
+        raise
+    
+    # 4. Notify Lawyer (TODO background task)
+    
+    return {"success": True, "booking_id": str(booking_id)}
+
+async def _recorded_booking_id(db: AsyncSession, order_id: str):
+    result = await db.execute(select(Payment.booking_id).where(Payment.razorpay_order_id == order_id))
+    return result.scalar_one_or_none()
+
+async def _create_paid_booking(db: AsyncSession, payment_in: PaymentVerify, draft: dict) -> uuid.UUID:
+    """
+    Booking, payment, escrow and history rows for a verified payment. Commits.
+    """
     # 3. Create DB Records
     # Booking
     booking_id = uuid.uuid4()
@@ -113,11 +141,4 @@ async def verify_payment(
     db.add(history)
     
     await db.commit()
-    
-    # 4. Cleanup Redis
-    await redis.delete(f"booking_draft:{draft_id}")
-    await redis.delete(f"order_draft:{payment_in.razorpay_order_id}")
-    
-    # 5. Notify Lawyer (TODO background task)
-    
-    return {"success": True, "booking_id": str(booking_id)}
+    return booking_id
@@ -1,13 +1,16 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 import uuid
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
 from api import deps
+from core import search
+from core.lawyers import record_review
+from core.pagination import fetch_page, NEXT_CURSOR_HEADER
 from db.session import get_db
 from models.user import User
 from models.lawyer import Lawyer
@@ -18,7 +21,7 @@ router = APIRouter()
 
 class ReviewCreate(BaseModel):
     booking_id: uuid.UUID
-    rating: int
+    rating: int = Field(..., ge=1, le=5)
     comment: Optional[str] = None
 
 class ReviewResponse(BaseModel):
@@ -66,24 +69,34 @@ async def create_review(
     )
     
     db.add(review)
+    # Same transaction: the aggregate never drifts from the reviews table
+    await record_review(db, booking.lawyer_id, review_in.rating)
     await db.commit()
     await db.refresh(review)
-    
-    # Optional: Update Lawyer's average rating here or compute on fly
+
+    # Rating-sorted search results changed
+    await search.invalidate_search_cache()
     
     return review
 
 @router.get("/lawyer/{lawyer_id}", response_model=List[ReviewResponse])
 async def get_lawyer_reviews(
     lawyer_id: uuid.UUID,
+    response: Response,
     db: AsyncSession = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 20
+    skip: int = Query(0, ge=0, deprecated=True),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None
 ) -> Any:
     """
-    Get reviews for a lawyer.
+    Get reviews for a lawyer, newest first.
+    Pass the X-Next-Cursor response header back as `cursor` to get the next page.
     """
-    stmt = select(Review).where(Review.lawyer_id == lawyer_id).order_by(Review.created_at.desc()).offset(skip).limit(limit)
-    result = await db.execute(stmt)
-    reviews = result.scalars().all()
+    stmt = select(Review).where(Review.lawyer_id == lawyer_id)
+    if skip and not cursor:
+        stmt = stmt.offset(skip)
+    sort_keys = [(Review.created_at, True), (Review.id, True)]
+    reviews, next_cursor = await fetch_page(db, stmt, sort_keys, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return reviews
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, HTTPException, Request
+
+from core import storage
+
+router = APIRouter()
+
+@router.put("/local/{key:path}")
+async def put_local_upload(
+    key: str,
+    expires: int,
+    max_bytes: int,
+    signature: str,
+    request: Request
+):
+    """
+    Receive a direct upload for the local storage backend.
+    Authorized by the signature issued with the upload parameters (like an S3 presigned
+    URL), not by a login token. Only used in development and benchmarks; with S3 or
+    Cloudinary, clients upload to the provider and never reach this endpoint.
+    """
+    backend = storage.get_backend()
+    if backend.name != "local":
+        raise HTTPException(status_code=404, detail="Not found")
+
+    content_type = request.headers.get("content-type", "")
+    if ".." in key.split("/") or not backend.verify_signature(key, expires, max_bytes, content_type, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired upload signature")
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(status_code=413, detail="Upload too large")
+
+    try:
+        size = await backend.write_stream(key, request.stream(), max_bytes)
+    except ValueError:
+        raise HTTPException(status_code=413, detail="Upload too large")
+    return {"key": key, "size": size}
@@ -1,16 +1,124 @@
+import hashlib
+import unicodedata
+from typing import AsyncIterator, Optional
+
 import google.generativeai as genai
+from core import cache
+from core.cache import SingleFlight, StreamFlight, TTLCache
 from core.config import settings
 
 genai.configure(api_key=settings.GEMINI_API_KEY)
 
+SUMMARY_MODEL = "gemini-pro"
+# Bump when the summary prompt changes, so cached summaries are not reused
+SUMMARY_PROMPT_VERSION = 1
+
+_summaries = TTLCache(maxsize=settings.SUMMARY_CACHE_SIZE, ttl=settings.SUMMARY_CACHE_TTL)
+_summary_calls = SingleFlight()
+_summary_streams = StreamFlight()
+
+def summary_cache_key(description: str) -> str:
+    """
+    Descriptions differing only in Unicode form or whitespace share a summary.
+    """
+    normalized = " ".join(unicodedata.normalize("NFKC", description).split())
+    digest = hashlib.sha256(normalized.encode()).hexdigest()
+    return f"ai_summary:{SUMMARY_MODEL}:{SUMMARY_PROMPT_VERSION}:{digest}"
+
+def summary_fallback(description: str) -> str:
+    # Fallback to original text if AI fails
+    return f"Auto-generated summary failed. Original text: {description}"
+
 async def generate_case_summary(description: str) -> str:
     """
     Generates a structured legal summary from a user's case description using Gemini.
+    Summaries are cached by description, and identical requests in flight at the same
+    time share one Gemini call, so double submits and retries cost no quota.
     """
     if not settings.GEMINI_API_KEY:
         return "AI Summary unavailable (API Key missing). Original Description: " + description
 
-    prompt = f"""You are a legal assistant helping to summarize case descriptions for lawyers.
+    key = summary_cache_key(description)
+    summary = _summaries.get(key)
+    if summary is None and _summary_streams.in_flight(key):
+        # Being streamed for a draft already: wait for that one instead of a second call
+        try:
+            parts = [part async for part in _summary_streams.follow(key, _stream_summary, key, description)]
+            summary = "".join(parts).strip()
+        except Exception as e:
+            print(f"Error generating AI summary: {e}")
+    if summary is None:
+        summary = await _summary_calls.run(key, _cached_summary, key, description)
+    if summary is None:
+        return summary_fallback(description)
+    return summary
+
+async def cached_case_summary(description: str) -> Optional[str]:
+    """
+    The summary generate_case_summary would return, if available without calling Gemini.
+    """
+    if not settings.GEMINI_API_KEY:
+        return "AI Summary unavailable (API Key missing). Original Description: " + description
+    key = summary_cache_key(description)
+    summary = _summaries.get(key)
+    if summary is None:
+        summary = await cache.get_json(key)
+        if summary is not None:
+            _summaries.set(key, summary)
+    return summary
+
+async def stream_case_summary(description: str) -> AsyncIterator[str]:
+    """
+    The case summary in pieces, as Gemini writes them (a cached summary comes in one
+    piece). Concurrent streams of the same description share one Gemini call: later
+    ones replay what was written so far, then follow. Raises if generation fails.
+    """
+    summary = await cached_case_summary(description)
+    if summary is None:
+        key = summary_cache_key(description)
+        if _summary_calls.in_flight(key):
+            # A non-streamed generation is running: its result, in one piece
+            summary = await _summary_calls.run(key, _cached_summary, key, description)
+            if summary is None:
+                raise ValueError("Summary generation failed")
+        else:
+            async for part in _summary_streams.follow(key, _stream_summary, key, description):
+                yield part
+            return
+    yield summary
+
+async def _stream_summary(key: str, description: str) -> AsyncIterator[str]:
+    # The one Gemini stream per description, shared through _summary_streams
+    model = genai.GenerativeModel(SUMMARY_MODEL)
+    response = await model.generate_content_async(_summary_prompt(description), stream=True)
+    parts = []
+    async for chunk in response:
+        text = chunk.text
+        if not parts:
+            text = text.lstrip()
+        if text:
+            parts.append(text)
+            yield text
+
+    summary = "".join(parts).strip()
+    if not summary:
+        raise ValueError("Empty summary")
+    _summaries.set(key, summary)
+    await cache.set_json(key, summary, settings.SUMMARY_CACHE_TTL)
+
+async def _cached_summary(key: str, description: str) -> Optional[str]:
+    # Redis shares summaries between workers; failures are not cached
+    summary = await cache.get_json(key)
+    if summary is None:
+        summary = await _summarize(description)
+        if summary is None:
+            return None
+        await cache.set_json(key, summary, settings.SUMMARY_CACHE_TTL)
+    _summaries.set(key, summary)
+    return summary
+
+def _summary_prompt(description: str) -> str:
+    return f"""You are a legal assistant helping to summarize case descriptions for lawyers.
 
 Given the following case description from a user, generate a clear, professional summary that captures the key legal issues and relevant details.
 
@@ -26,14 +134,14 @@ Generate a concise summary (100-150 words) that:
 
 Summary:"""
 
+async def _summarize(description: str) -> Optional[str]:
     try:
-        model = genai.GenerativeModel('gemini-pro')
-        response = await model.generate_content_async(prompt)
+        model = genai.GenerativeModel(SUMMARY_MODEL)
+        response = await model.generate_content_async(_summary_prompt(description))
         return response.text.strip()
     except Exception as e:
         print(f"Error generating AI summary: {e}")
-        # Fallback to original text if AI fails
-        return f"Auto-generated summary failed. Original text: {description}"
+        return None
 
 async def generate_generic_response(prompt: str) -> str:
     """
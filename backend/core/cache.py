@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterable, Iterator, List, Optional
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from core.config import settings
+
+# Shared Redis connection (booking drafts, payment order mapping, read caches)
+redis = aioredis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
+
+
+def make_key(namespace: str, params: dict) -> str:
+    """
+    Stable cache key for a set of parameters: order-independent, None values dropped.
+    """
+    normalized = {k: v for k, v in params.items() if v is not None}
+    digest = hashlib.sha1(
+        json.dumps(normalized, sort_keys=True, default=str, separators=(",", ":")).encode()
+    ).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+async def generation(name: str) -> Optional[int]:
+    """
+    Current generation of a cache family. Embedding it in keys lets a single INCR
+    (bump_generation) invalidate every entry of the family at once.
+    Returns None when Redis is unavailable.
+    """
+    try:
+        value = await redis.get(f"{name}:generation")
+    except RedisError as e:
+        print(f"Cache read error: {e}")
+        return None
+    return int(value or 0)
+
+
+async def bump_generation(name: str) -> None:
+    try:
+        await redis.incr(f"{name}:generation")
+    except RedisError as e:
+        print(f"Cache invalidation error: {e}")
+
+
+async def get_json(key: Optional[str]) -> Optional[Any]:
+    """
+    Read a cached JSON value. Cache failures (and a None key) are treated as misses.
+    """
+    if key is None:
+        return None
+    try:
+        raw = await redis.get(key)
+    except RedisError as e:
+        print(f"Cache read error: {e}")
+        return None
+    return json.loads(raw) if raw is not None else None
+
+
+async def set_json(key: Optional[str], value: Any, ttl: int) -> None:
+    if key is None:
+        return
+    try:
+        await redis.setex(key, ttl, json.dumps(value, default=str))
+    except RedisError as e:
+        print(f"Cache write error: {e}")
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Small in-process LRU cache with a per-entry time to live, safe to share between threads.
+    For values that are cheap to recompute but hot enough that recomputing every time adds up.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: while one is in flight, later callers
+    await its result instead of starting their own. Per process, nothing is remembered
+    once the call finishes (pair it with a cache for that).
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(func(*args))
+            self._calls[key] = call
+            call.add_done_callback(lambda _: self._calls.pop(key, None))
+        # One caller going away (client disconnect) must not cancel the call for the others
+        return await asyncio.shield(call)
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+
+class _FlightStream:
+    def __init__(self):
+        self.parts: List[Any] = []
+        self.done = False
+        self.error: Optional[Exception] = None
+        self.changed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class StreamFlight:
+    """
+    SingleFlight for streams: while a stream for a key is being produced, later callers
+    get the pieces produced so far and then follow it, instead of starting their own.
+    The producer runs in its own task, so it continues when a caller goes away.
+    """
+
+    def __init__(self):
+        self._streams: Dict[Hashable, _FlightStream] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._streams
+
+    async def follow(self, key: Hashable, func: Callable[..., AsyncIterator[Any]], *args) -> AsyncIterator[Any]:
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = _FlightStream()
+            self._streams[key] = stream
+            stream.task = asyncio.ensure_future(self._produce(key, stream, func(*args)))
+
+        sent = 0
+        while True:
+            while sent < len(stream.parts):
+                sent += 1
+                yield stream.parts[sent - 1]
+            if stream.done:
+                if stream.error is not None:
+                    raise stream.error
+                return
+            # No await since the checks above, so no piece can be missed
+            stream.changed.clear()
+            await stream.changed.wait()
+
+    async def _produce(self, key: Hashable, stream: _FlightStream, parts: AsyncIterator[Any]) -> None:
+        try:
+            async for part in parts:
+                stream.parts.append(part)
+                stream.changed.set()
+        except Exception as e:
+            stream.error = e
+        except BaseException:
+            stream.error = RuntimeError("Stream interrupted")
+            raise
+        finally:
+            stream.done = True
+            self._streams.pop(key, None)
+            stream.changed.set()
+
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set: `item in bloom` is never False for an added item, and
+    wrongly True for about `error_rate` of the others. Lets hot paths skip a lookup for
+    keys that are almost never present. Items cannot be removed; rebuild it instead.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterator[int]:
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, items: Iterable[str]) -> None:
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
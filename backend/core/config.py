@@ -24,11 +24,49 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str
 
+    # Lawyer search
+    SEARCH_CACHE_TTL: int = 300
+    SEARCH_FACETS_CACHE_TTL: int = 60
+    MATCH_INDEX_PATH: str = "data/lawyer_match_index.jsonl"
+    # Local sentence-transformers model behind /lawyers/match (changing it needs scripts/rebuild_match_index.py)
+    MATCH_EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    # Lawyers less similar than this to a description are not suggested
+    MATCH_MIN_SCORE: float = 0.25
+    # Threads embedding texts and reading the index log, per worker
+    MATCH_WORKERS: int = 2
+    # Compact the index log once it holds this many lines per indexed lawyer
+    MATCH_INDEX_COMPACT_RATIO: float = 3.0
+
+    # Booking drafts: redis, or memory (single process: dev and benchmarks)
+    DRAFT_STORE: str = "redis"
+    # AI case summaries reused for the same description (per worker, and in Redis)
+    SUMMARY_CACHE_TTL: int = 3600
+    SUMMARY_CACHE_SIZE: int = 2000
+    # A draft summary still pending after this many seconds lost its worker and is given up
+    SUMMARY_JOB_TIMEOUT: int = 90
+
     # Security
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # A refresh token just rotated is still accepted this long (two tabs refreshing at once)
+    REFRESH_REUSE_GRACE_SECONDS: int = 30
     ALGORITHM: str = "HS256"
+    # bcrypt cost; stored hashes with another cost are rehashed on the next login
+    BCRYPT_ROUNDS: int = 12
+    # Threads hashing/verifying passwords, and how many operations may wait for them
+    PASSWORD_HASH_WORKERS: int = os.cpu_count() or 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    # Authenticated users cached by get_current_user: Redis copy (shared by workers)
+    # and a shorter in-process copy
+    PRINCIPAL_CACHE_REDIS: bool = True
+    PRINCIPAL_CACHE_TTL: int = 300
+    PRINCIPAL_CACHE_LOCAL_TTL: int = 30
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    # Logouts reach every worker's revocation filter within this many seconds
+    REVOCATION_SYNC_SECONDS: int = 5
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
 
     # External APIs
     RAZORPAY_KEY_ID: str = ""
@@ -37,12 +75,29 @@ class Settings(BaseSettings):
     AGORA_APP_ID: str = ""
     AGORA_APP_CERTIFICATE: str = ""
     
+    # File storage: local, s3 or cloudinary (empty: cloudinary if USE_CLOUDINARY, else s3)
+    STORAGE_BACKEND: str = ""
+    LOCAL_STORAGE_DIR: str = "static"
+    LOCAL_STORAGE_URL: str = "/static"
+    # Presigned download links (S3): lifetime, and how many are reused in-process
+    SIGNED_URL_TTL: int = 3600
+    SIGNED_URL_CACHE_SIZE: int = 10000
+    # Direct-to-storage uploads: largest accepted document, and how long an upload URL is valid
+    UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024
+    UPLOAD_URL_TTL: int = 900
+    PROFILE_PHOTO_MAX_BYTES: int = 5 * 1024 * 1024
+    # Processes rendering profile photo thumbnails
+    IMAGE_WORKERS: int = 2
+
     # AWS S3
     AWS_ACCESS_KEY: str = ""
     AWS_SECRET_KEY: str = ""
     AWS_S3_BUCKET: str = "legal-booking-bucket"
     AWS_REGION: str = "ap-south-1"
     
+    # Max concurrent blocking uploads per worker
+    STORAGE_UPLOAD_WORKERS: int = 8
+
     # Cloudinary (Free Tier Storage)
     USE_CLOUDINARY: bool = True
     CLOUDINARY_CLOUD_NAME: str = ""
@@ -0,0 +1,286 @@
+"""
+Booking drafts: what a user is about to book, kept between /bookings/create, /confirm
+and the payment verification.
+
+Each draft is a Redis hash `booking_draft:<id>` (one JSON-encoded value per field), so
+changes write only the fields that changed, and `order_draft:<razorpay order id>` maps
+a payment back to its draft. Every endpoint step is a single round trip (a pipeline or
+a Lua script); a booking goes from draft to paid in four (create, read + attach order on
+confirm, take on verify) instead of the eight separate commands of the JSON blobs.
+
+Progress on a draft (its AI summary being written) is also published as events, on
+the Redis channel `booking_draft_events:<id>`, for clients following it live.
+
+DRAFT_STORE=memory keeps drafts in-process instead, for single-node dev and benchmarks.
+"""
+import asyncio
+import json
+import time
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncContextManager, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from core.cache import TTLCache, redis
+from core.config import settings
+
+# Drafts live 15 minutes, counted again from confirmation (time to pay)
+DRAFT_TTL = 900
+
+DRAFT_PREFIX = "booking_draft:"
+ORDER_PREFIX = "order_draft:"
+EVENTS_PREFIX = "booking_draft_events:"
+
+# Waits up to `timeout` seconds for the next event of a subscription; None on timeout
+NextEvent = Callable[[float], Awaitable[Optional[dict]]]
+
+
+class DraftStore(ABC):
+    @abstractmethod
+    async def create(self, draft_id: str, data: dict) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, draft_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def update(self, draft_id: str, fields: dict, refresh_ttl: bool = False, expected: Optional[dict] = None) -> bool:
+        """
+        Write only `fields`, provided every field in `expected` still has that value.
+        Returns False (and writes nothing) if the draft expired or did not match.
+        """
+
+    @abstractmethod
+    async def attach_order(self, draft_id: str, order_id: str) -> bool:
+        """
+        Record the payment order on the draft and index the draft by it; both live
+        DRAFT_TTL from now. Returns False if the draft expired.
+        """
+
+    @abstractmethod
+    async def take_by_order(self, order_id: str) -> Optional[Tuple[str, Optional[dict]]]:
+        """
+        Atomically remove and return (draft id, draft) for a payment order, so a payment
+        is turned into a booking once even when verified twice concurrently. None if the
+        order is unknown, a None draft if only the draft expired.
+        """
+
+    @abstractmethod
+    async def restore(self, draft_id: str, order_id: str, data: dict) -> None:
+        """
+        Put back a taken draft whose booking could not be created, so verifying can be retried.
+        """
+
+    @abstractmethod
+    async def publish(self, draft_id: str, event: dict) -> None:
+        ...
+
+    @abstractmethod
+    def subscribe(self, draft_id: str) -> AsyncContextManager[NextEvent]:
+        """
+        Receive the events published for a draft from now on:
+        `async with store.subscribe(draft_id) as next_event: event = await next_event(15)`
+        """
+
+
+# KEYS[1] draft; ARGV[1] ttl ("" keeps the current one), ARGV[2] number of expected
+# field/value pairs, then those pairs, then the field/value pairs to write
+_UPDATE = redis.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+local expected = tonumber(ARGV[2])
+for i = 3, 2 + 2 * expected, 2 do
+  if redis.call('HGET', KEYS[1], ARGV[i]) ~= ARGV[i + 1] then return 0 end
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 3 + 2 * expected))
+if ARGV[1] ~= '' then redis.call('EXPIRE', KEYS[1], ARGV[1]) end
+return 1
+""")
+
+# KEYS[1] draft, KEYS[2] order index; ARGV: draft id, ttl, order id
+_ATTACH_ORDER = redis.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+redis.call('HSET', KEYS[1], 'razorpay_order_id', cjson.encode(ARGV[3]))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('SET', KEYS[2], ARGV[1], 'EX', ARGV[2])
+return 1
+""")
+
+# KEYS[1] order index; ARGV[1] draft key prefix. The draft key is derived from the index
+# value, so this needs a non-clustered Redis (or both keys in one hash slot).
+_TAKE = redis.register_script("""
+local draft_id = redis.call('GET', KEYS[1])
+if not draft_id then return false end
+local draft_key = ARGV[1] .. draft_id
+local fields = redis.call('HGETALL', draft_key)
+redis.call('DEL', KEYS[1], draft_key)
+return {draft_id, fields}
+""")
+
+
+def _encode(data: dict) -> Dict[str, str]:
+    return {field: json.dumps(value) for field, value in data.items()}
+
+
+def _decode(raw: Dict[str, str]) -> dict:
+    return {field: json.loads(value) for field, value in raw.items()}
+
+
+class RedisDraftStore(DraftStore):
+    async def create(self, draft_id: str, data: dict) -> None:
+        key = DRAFT_PREFIX + draft_id
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=_encode(data))
+            pipe.expire(key, DRAFT_TTL)
+            await pipe.execute()
+
+    async def get(self, draft_id: str) -> Optional[dict]:
+        raw = await redis.hgetall(DRAFT_PREFIX + draft_id)
+        return _decode(raw) if raw else None
+
+    async def update(self, draft_id: str, fields: dict, refresh_ttl: bool = False, expected: Optional[dict] = None) -> bool:
+        expected = expected or {}
+        args = [DRAFT_TTL if refresh_ttl else "", len(expected)]
+        for pairs in (expected, fields):
+            for field, value in _encode(pairs).items():
+                args += [field, value]
+        return bool(await _UPDATE(keys=[DRAFT_PREFIX + draft_id], args=args))
+
+    async def attach_order(self, draft_id: str, order_id: str) -> bool:
+        return bool(await _ATTACH_ORDER(
+            keys=[DRAFT_PREFIX + draft_id, ORDER_PREFIX + order_id],
+            args=[draft_id, DRAFT_TTL, order_id],
+        ))
+
+    async def take_by_order(self, order_id: str) -> Optional[Tuple[str, Optional[dict]]]:
+        result = await _TAKE(keys=[ORDER_PREFIX + order_id], args=[DRAFT_PREFIX])
+        if not result:
+            return None
+        draft_id, flat = result
+        raw = dict(zip(flat[::2], flat[1::2]))
+        return draft_id, _decode(raw) if raw else None
+
+    async def restore(self, draft_id: str, order_id: str, data: dict) -> None:
+        key = DRAFT_PREFIX + draft_id
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=_encode(data))
+            pipe.expire(key, DRAFT_TTL)
+            pipe.set(ORDER_PREFIX + order_id, draft_id, ex=DRAFT_TTL)
+            await pipe.execute()
+
+    async def publish(self, draft_id: str, event: dict) -> None:
+        await redis.publish(EVENTS_PREFIX + draft_id, json.dumps(event))
+
+    @asynccontextmanager
+    async def subscribe(self, draft_id: str) -> AsyncIterator[NextEvent]:
+        # One Redis connection per subscriber, held until it leaves
+        pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(EVENTS_PREFIX + draft_id)
+
+        async def next_event(timeout: float) -> Optional[dict]:
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                # None for subscription confirmations too, hence the loop
+                message = await pubsub.get_message(timeout=remaining)
+                if message is not None:
+                    return json.loads(message["data"])
+
+        try:
+            yield next_event
+        finally:
+            await pubsub.aclose()
+
+
+class MemoryDraftStore(DraftStore):
+    """
+    Drafts in this process only: nothing is shared between workers. Every operation runs
+    without awaiting, so each one is atomic on the event loop like its Redis counterpart.
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        # draft id -> (draft, expiry on the monotonic clock); order id -> draft id
+        self._drafts = TTLCache(maxsize=maxsize, ttl=DRAFT_TTL)
+        self._orders = TTLCache(maxsize=maxsize, ttl=DRAFT_TTL)
+        self._listeners: Dict[str, set] = {}
+
+    def _put(self, draft_id: str, data: dict, ttl: float) -> None:
+        self._drafts.set(draft_id, (data, time.monotonic() + ttl), ttl=ttl)
+
+    async def create(self, draft_id: str, data: dict) -> None:
+        self._put(draft_id, dict(data), DRAFT_TTL)
+
+    async def get(self, draft_id: str) -> Optional[dict]:
+        entry = self._drafts.get(draft_id)
+        # A copy, like a Redis read: callers may modify it
+        return dict(entry[0]) if entry else None
+
+    async def update(self, draft_id: str, fields: dict, refresh_ttl: bool = False, expected: Optional[dict] = None) -> bool:
+        entry = self._drafts.get(draft_id)
+        if entry is None:
+            return False
+        data, expires_at = entry
+        if any(field not in data or data[field] != value for field, value in (expected or {}).items()):
+            return False
+        ttl = DRAFT_TTL if refresh_ttl else expires_at - time.monotonic()
+        self._put(draft_id, {**data, **fields}, ttl)
+        return True
+
+    async def attach_order(self, draft_id: str, order_id: str) -> bool:
+        entry = self._drafts.get(draft_id)
+        if entry is None:
+            return False
+        self._put(draft_id, {**entry[0], "razorpay_order_id": order_id}, DRAFT_TTL)
+        self._orders.set(order_id, draft_id)
+        return True
+
+    async def take_by_order(self, order_id: str) -> Optional[Tuple[str, Optional[dict]]]:
+        draft_id = self._orders.get(order_id)
+        if draft_id is None:
+            return None
+        self._orders.pop(order_id)
+        entry = self._drafts.get(draft_id)
+        self._drafts.pop(draft_id)
+        return draft_id, entry[0] if entry else None
+
+    async def restore(self, draft_id: str, order_id: str, data: dict) -> None:
+        self._put(draft_id, dict(data), DRAFT_TTL)
+        self._orders.set(order_id, draft_id)
+
+    async def publish(self, draft_id: str, event: dict) -> None:
+        for queue in self._listeners.get(draft_id, ()):
+            queue.put_nowait(event)
+
+    @asynccontextmanager
+    async def subscribe(self, draft_id: str) -> AsyncIterator[NextEvent]:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._listeners.setdefault(draft_id, set()).add(queue)
+
+        async def next_event(timeout: float) -> Optional[dict]:
+            try:
+                return await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+        try:
+            yield next_event
+        finally:
+            listeners = self._listeners[draft_id]
+            listeners.discard(queue)
+            if not listeners:
+                del self._listeners[draft_id]
+
+
+STORES = {
+    "redis": RedisDraftStore,
+    "memory": MemoryDraftStore,
+}
+
+
+@lru_cache(maxsize=None)
+def get_store() -> DraftStore:
+    if settings.DRAFT_STORE not in STORES:
+        raise ValueError(f"Unknown DRAFT_STORE {settings.DRAFT_STORE!r}, expected one of {sorted(STORES)}")
+    return STORES[settings.DRAFT_STORE]()
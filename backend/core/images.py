@@ -0,0 +1,65 @@
+import asyncio
+import io
+import multiprocessing
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps
+
+from core.config import settings
+
+# Derivative name -> (square size in px, Lawyer column)
+PHOTO_DERIVATIVES = {
+    "thumb": (96, "profile_photo_thumb_url"),
+    "card": (320, "profile_photo_card_url"),
+}
+WEBP_QUALITY = 80
+
+# Decompression bomb limit. Pillow only raises above twice this and warns in
+# between; render_photo_derivatives turns the warning into an error
+Image.MAX_IMAGE_PIXELS = 50_000_000
+
+
+def render_photo_derivatives(data: bytes) -> Dict[str, bytes]:
+    """
+    Square, center-cropped WebP renditions of a photo, one per PHOTO_DERIVATIVES entry.
+    CPU-bound: runs in the image process pool, never on the event loop.
+    """
+    largest = max(size for size, _ in PHOTO_DERIVATIVES.values())
+    with warnings.catch_warnings():
+        # Over MAX_IMAGE_PIXELS: refuse, don't decode
+        warnings.simplefilter("error", Image.DecompressionBombWarning)
+        image_file = Image.open(io.BytesIO(data))
+    with image_file as image:
+        # JPEG decoders can downscale while decoding, much cheaper than a full decode
+        image.draft("RGB", (largest * 2, largest * 2))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+        renditions = {}
+        for name, (size, _) in PHOTO_DERIVATIVES.items():
+            fitted = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            buffer = io.BytesIO()
+            fitted.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+            renditions[name] = buffer.getvalue()
+    return renditions
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _executor() -> ProcessPoolExecutor:
+    # Created on first use, inside each server worker; "spawn" because forking a
+    # process that already runs threads (event loop, upload pool) is unsafe
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+async def render_in_pool(data: bytes) -> Dict[str, bytes]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor(), render_photo_derivatives, data)
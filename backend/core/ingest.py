@@ -0,0 +1,230 @@
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, Request
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from core import storage
+from core.storage.base import UploadSink
+
+# Bytes needed to recognise every signature below
+SNIFF_BYTES = 12
+MAX_TEXT_FIELD_BYTES = 64 * 1024
+MAX_PARTS = 32
+
+_SIGNATURES = [
+    (b"%PDF-", "application/pdf"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+
+def sniff_mime(head: bytes) -> Optional[str]:
+    """
+    Content type from the first bytes of a file; the client's Content-Type is not trusted.
+    """
+    for signature, mime in _SIGNATURES:
+        if head.startswith(signature):
+            return mime
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+@dataclass
+class FileRule:
+    max_bytes: int
+    content_types: Set[str]
+
+
+@dataclass
+class IngestedFile:
+    """
+    A file part streamed to a storage sink; hashed and sized on the fly.
+    Nothing is visible in storage until commit().
+    """
+
+    field: str
+    filename: Optional[str]
+    rule: FileRule
+    sink: Optional[UploadSink] = None
+    content_type: Optional[str] = None  # sniffed
+    size: int = 0
+    committed: bool = False
+    _hash: "hashlib._Hash" = field(default_factory=hashlib.sha256)
+    _head: bytes = b""
+
+    @property
+    def digest(self) -> str:
+        return self._hash.hexdigest()
+
+    async def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.rule.max_bytes:
+            raise HTTPException(status_code=413, detail=f"{self.field} is larger than {self.rule.max_bytes} bytes")
+        self._hash.update(chunk)
+        if self.sink is None:
+            # Hold the first bytes back until the type is known
+            self._head += chunk
+            if len(self._head) < SNIFF_BYTES:
+                return
+            chunk = self._open()
+        await self.sink.write(chunk)
+
+    def _open(self) -> bytes:
+        self.content_type = sniff_mime(self._head)
+        if self.content_type not in self.rule.content_types:
+            raise HTTPException(status_code=415, detail=f"Unsupported file type for {self.field}")
+        self.sink = storage.get_backend().open_sink(self.content_type)
+        head, self._head = self._head, b""
+        return head
+
+    async def finish(self) -> None:
+        # Files shorter than SNIFF_BYTES are still held back
+        if self.sink is None:
+            head = self._open()
+            await self.sink.write(head)
+
+    async def commit(self, directory: str) -> str:
+        key = await self.sink.commit(directory, self.digest, self.filename)
+        self.committed = True
+        return key
+
+    async def abort(self) -> None:
+        if self.sink is not None and not self.committed:
+            await self.sink.abort()
+
+
+@dataclass
+class MultipartUpload:
+    fields: Dict[str, str]
+    files: Dict[str, IngestedFile]
+
+    async def abort(self) -> None:
+        """
+        Discard every file not committed yet. Call on any failure after receive_multipart.
+        """
+        for file in self.files.values():
+            await file.abort()
+
+
+class _Events:
+    """
+    Collects parser callbacks; the parser is synchronous, sinks are async.
+    """
+
+    def __init__(self):
+        self.items: List[Tuple[str, bytes]] = []
+        self.header_field = b""
+        self.header_value = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": lambda: self.items.append(("begin", b"")),
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": lambda: self.items.append(("headers", b"")),
+            "on_part_data": lambda data, start, end: self.items.append(("data", bytes(data[start:end]))),
+            "on_part_end": lambda: self.items.append(("end", b"")),
+        }
+
+    def _on_header_field(self, data, start, end):
+        self.header_field += data[start:end]
+
+    def _on_header_value(self, data, start, end):
+        self.header_value += data[start:end]
+
+    def _on_header_end(self):
+        self.items.append(("header", self.header_field.lower() + b"\0" + self.header_value))
+        self.header_field = self.header_value = b""
+
+
+async def receive_multipart(request: Request, file_rules: Dict[str, FileRule]) -> MultipartUpload:
+    """
+    Read a multipart/form-data body as a stream instead of spooling it like UploadFile.
+
+    File parts named in `file_rules` are forwarded chunk by chunk to a storage sink while
+    being hashed, sized and type-sniffed; a part over its limit or of the wrong type fails
+    at once, without reading the rest. Memory per upload stays constant (one request chunk,
+    plus one part buffer for S3). Files must then be committed (or the upload aborted).
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected multipart/form-data")
+
+    # Reject obviously oversized bodies before reading anything
+    limit = sum(rule.max_bytes for rule in file_rules.values()) + MAX_PARTS * MAX_TEXT_FIELD_BYTES
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > limit:
+        raise HTTPException(status_code=413, detail="Request body too large")
+
+    upload = MultipartUpload(fields={}, files={})
+    events = _Events()
+    parser = MultipartParser(boundary, events.callbacks())
+    headers: Dict[bytes, bytes] = {}
+    current_file: Optional[IngestedFile] = None
+    current_name: Optional[str] = None
+    text = bytearray()
+    parts = 0
+
+    async def handle(kind: str, data: bytes):
+        nonlocal current_file, current_name, parts
+        if kind == "begin":
+            headers.clear()
+            text.clear()
+            parts += 1
+            if parts > MAX_PARTS:
+                raise HTTPException(status_code=400, detail="Too many form fields")
+        elif kind == "header":
+            name, _, value = data.partition(b"\0")
+            headers[name] = value
+        elif kind == "headers":
+            _, options = parse_options_header(headers.get(b"content-disposition", b""))
+            current_name = options.get(b"name", b"").decode("utf-8", "replace")
+            if current_name in upload.fields or current_name in upload.files:
+                raise HTTPException(status_code=400, detail=f"Duplicate field {current_name}")
+            current_file = None
+            if b"filename" in options:
+                if current_name not in file_rules:
+                    raise HTTPException(status_code=400, detail=f"Unexpected file field {current_name}")
+                filename = options[b"filename"].decode("utf-8", "replace")
+                current_file = IngestedFile(current_name, filename, file_rules[current_name])
+        elif kind == "data":
+            if current_file is not None:
+                await current_file.write(data)
+            else:
+                text.extend(data)
+                if len(text) > MAX_TEXT_FIELD_BYTES:
+                    raise HTTPException(status_code=413, detail=f"{current_name} is too long")
+        elif kind == "end":
+            if current_file is not None:
+                # Browsers send an empty part when no file was chosen
+                if current_file.size:
+                    await current_file.finish()
+                    upload.files[current_name] = current_file
+            else:
+                upload.fields[current_name] = text.decode("utf-8", "replace")
+            current_file = None
+
+    try:
+        async for chunk in request.stream():
+            try:
+                parser.write(chunk)
+            except FormParserError:
+                raise HTTPException(status_code=400, detail="Malformed multipart body")
+            for kind, data in events.items:
+                await handle(kind, data)
+            events.items.clear()
+        parser.finalize()
+    except BaseException:
+        if current_file is not None:
+            await current_file.abort()
+        await upload.abort()
+        raise
+    return upload
@@ -0,0 +1,229 @@
+import asyncio
+import io
+import uuid
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import select, update, func, cast, case, Float, literal, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, joinedload
+
+from core import images, storage
+
+from models.user import User
+from models.lawyer import Lawyer, LawyerCourt, LawyerSpecialization
+from models.location import Court
+from models.review import Review
+from models.specialization import Specialization
+
+
+def lawyer_load_options():
+    """
+    Loader options for everything schemas.lawyer.Lawyer serializes.
+
+    A page of lawyers costs three queries regardless of its size:
+    the lawyers, their courts (joined to Court) and their specializations
+    (joined to both Specialization rows).
+    """
+    return (
+        selectinload(Lawyer.courts).joinedload(LawyerCourt.court),
+        selectinload(Lawyer.specializations).options(
+            joinedload(LawyerSpecialization.specialization),
+            joinedload(LawyerSpecialization.sub_specialization),
+        ),
+    )
+
+
+async def load_lawyers(db: AsyncSession, lawyer_ids: Iterable) -> List[Lawyer]:
+    """
+    Load lawyers with their response relationships, preserving the order of `lawyer_ids`.
+    """
+    ids = list(lawyer_ids)
+    if not ids:
+        return []
+
+    stmt = (
+        select(Lawyer)
+        .where(Lawyer.id.in_(ids))
+        .options(*lawyer_load_options())
+        .execution_options(populate_existing=True)
+    )
+    result = await db.execute(stmt)
+    by_id = {str(lawyer.id): lawyer for lawyer in result.scalars().all()}
+    return [by_id[str(i)] for i in ids if str(i) in by_id]
+
+
+async def get_lawyer(db: AsyncSession, lawyer_id) -> Optional[Lawyer]:
+    lawyers = await load_lawyers(db, [lawyer_id])
+    return lawyers[0] if lawyers else None
+
+
+async def find_missing_references(
+    db: AsyncSession, court_ids: Iterable, specialization_ids: Iterable
+) -> Tuple[Set, Set]:
+    """
+    Check court and specialization IDs in one round trip.
+    Returns the (court_ids, specialization_ids) that do not exist.
+    """
+    court_ids, specialization_ids = set(court_ids), set(specialization_ids)
+    if not court_ids and not specialization_ids:
+        return set(), set()
+
+    stmt = union_all(
+        select(literal("court").label("kind"), Court.id.label("id")).where(Court.id.in_(court_ids)),
+        select(literal("specialization"), Specialization.id).where(Specialization.id.in_(specialization_ids)),
+    )
+    found = {(kind, ref_id) for kind, ref_id in (await db.execute(stmt)).all()}
+    return (
+        {i for i in court_ids if ("court", i) not in found},
+        {i for i in specialization_ids if ("specialization", i) not in found},
+    )
+
+
+def _histogram_column(rating: int):
+    return getattr(Lawyer, f"rating_{rating}_count")
+
+
+async def record_review(db: AsyncSession, lawyer_id, rating: int) -> None:
+    """
+    Fold one new review into the lawyer's rating aggregates.
+    A single atomic UPDATE in the caller's transaction (commit it together with the review).
+    """
+    bucket = _histogram_column(rating)
+    stmt = (
+        update(Lawyer)
+        .where(Lawyer.id == lawyer_id)
+        .values({
+            Lawyer.rating_count: Lawyer.rating_count + 1,
+            Lawyer.rating_sum: Lawyer.rating_sum + rating,
+            Lawyer.rating_avg: cast(Lawyer.rating_sum + rating, Float) / cast(Lawyer.rating_count + 1, Float),
+            bucket: bucket + 1,
+            Lawyer.updated_at: Lawyer.updated_at,
+        })
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(stmt)
+
+
+async def rebuild_rating_aggregates(db: AsyncSession, lawyer_ids: Optional[Iterable] = None) -> None:
+    """
+    Recompute rating aggregates from `reviews` for the given lawyers (or all lawyers),
+    correcting any drift. Lawyers without reviews are reset to zero.
+    """
+    counts = {
+        f"rating_{n}_count": func.count(Review.id).filter(Review.rating == n)
+        for n in range(1, 6)
+    }
+    agg = (
+        select(
+            Lawyer.id.label("lawyer_id"),
+            func.count(Review.id).label("rating_count"),
+            func.coalesce(func.sum(Review.rating), 0).label("rating_sum"),
+            *[expr.label(name) for name, expr in counts.items()],
+        )
+        .select_from(Lawyer)
+        .outerjoin(Review, Review.lawyer_id == Lawyer.id)
+        .group_by(Lawyer.id)
+    )
+    if lawyer_ids is not None:
+        ids = list(lawyer_ids)
+        if not ids:
+            return
+        agg = agg.where(Lawyer.id.in_(ids))
+    agg = agg.subquery("agg")
+
+    stmt = (
+        update(Lawyer)
+        .where(Lawyer.id == agg.c.lawyer_id)
+        .values(
+            rating_count=agg.c.rating_count,
+            rating_sum=agg.c.rating_sum,
+            rating_avg=func.coalesce(
+                cast(agg.c.rating_sum, Float) / cast(func.nullif(agg.c.rating_count, 0), Float), 0
+            ),
+            updated_at=Lawyer.updated_at,
+            **{name: agg.c[name] for name in counts},
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(stmt)
+
+
+async def apply_verification_decisions(
+    db: AsyncSession, decisions: Iterable[Tuple[object, str, Optional[str]]], verified_by
+) -> Dict[str, str]:
+    """
+    Apply (lawyer_id, "approve" | "reject", reason) decisions with set-based UPDATEs:
+    one lookup, one UPDATE per action and one for users.is_verified, whatever the batch size.
+    Runs in the caller's transaction; the caller commits.
+
+    Returns {lawyer_id: "approved" | "rejected" | "not_found"}. A lawyer listed twice
+    gets the last decision.
+    """
+    latest = {uuid.UUID(str(lawyer_id)): (action, reason) for lawyer_id, action, reason in decisions}
+    if not latest:
+        return {}
+
+    result = await db.execute(select(Lawyer.id).where(Lawyer.id.in_(list(latest))))
+    existing = set(result.scalars().all())
+
+    approve = [i for i in existing if latest[i][0] == "approve"]
+    reject = [i for i in existing if latest[i][0] == "reject"]
+
+    if approve:
+        await db.execute(
+            update(Lawyer)
+            .where(Lawyer.id.in_(approve))
+            .values(
+                verification_status="verified",
+                verified_at=func.now(),
+                verified_by=verified_by,
+                rejection_reason=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        # Update User level flag too
+        await db.execute(
+            update(User)
+            .where(User.id.in_(select(Lawyer.user_id).where(Lawyer.id.in_(approve))))
+            .values(is_verified=True)
+            .execution_options(synchronize_session=False)
+        )
+
+    if reject:
+        reasons = {i: latest[i][1] for i in reject if latest[i][1]}
+        await db.execute(
+            update(Lawyer)
+            .where(Lawyer.id.in_(reject))
+            .values(
+                verification_status="rejected",
+                rejection_reason=case(reasons, value=Lawyer.id, else_=None) if reasons else None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    outcome = {"approve": "approved", "reject": "rejected"}
+    return {
+        str(lawyer_id): outcome[action] if lawyer_id in existing else "not_found"
+        for lawyer_id, (action, _) in latest.items()
+    }
+
+
+async def generate_photo_derivatives(db: AsyncSession, lawyer_id, photo_key: str) -> bool:
+    """
+    Render the profile photo's WebP derivatives in the image process pool, store them and
+    record them on the lawyer. Returns False if the photo changed meanwhile (nothing is
+    recorded then, so a newer upload never gets stale thumbnails). Does not commit.
+    """
+    backend = storage.get_backend()
+    renditions = await images.render_in_pool(await backend.read(photo_key))
+    stored = await asyncio.gather(*(
+        backend.save(io.BytesIO(data), "lawyers/photos", f"{name}.webp", "image/webp")
+        for name, data in renditions.items()
+    ))
+
+    result = await db.execute(
+        update(Lawyer)
+        .where(Lawyer.id == lawyer_id, Lawyer.profile_photo_url == photo_key)
+        .values({images.PHOTO_DERIVATIVES[name][1]: key for name, key in zip(renditions, stored)})
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
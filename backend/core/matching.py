@@ -0,0 +1,291 @@
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from core.config import settings
+
+try:
+    import fcntl
+except ImportError:
+    # Windows (single-worker dev): appends and compaction are not locked across processes
+    fcntl = None
+
+# The log is compacted once it holds this many lines and MATCH_INDEX_COMPACT_RATIO
+# lines per indexed lawyer
+COMPACT_MIN_LINES = 1000
+
+# Embedding and index file I/O are blocking: they run here, never on the event loop
+_executor = ThreadPoolExecutor(max_workers=settings.MATCH_WORKERS, thread_name_prefix="lawyer-match")
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def _get_model():
+    # Loaded on first use: the model is ~90 MB and most processes (scripts, workers
+    # that never match) do not need it
+    global _model
+    with _model_lock:
+        if _model is None:
+            from sentence_transformers import SentenceTransformer
+            _model = SentenceTransformer(settings.MATCH_EMBEDDING_MODEL, device="cpu")
+        return _model
+
+
+def embed(texts: List[str]) -> np.ndarray:
+    """
+    L2-normalized sentence embeddings (one row per text) from the local model
+    MATCH_EMBEDDING_MODEL, so a dot product is the cosine similarity. Texts match on
+    meaning, not shared words ("husband left me" ~ family law, divorce).
+    Blocking: a few milliseconds per short text on CPU, no remote call.
+    """
+    vectors = _get_model().encode(list(texts), normalize_embeddings=True, convert_to_numpy=True)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def lawyer_document(lawyer) -> str:
+    """
+    Text a lawyer is matched on: specializations (counted twice, they matter most) and bio.
+    Expects specializations to be loaded (core.lawyers.load_lawyers).
+    """
+    names = []
+    for ls in lawyer.specializations:
+        if ls.specialization is not None:
+            names.append(ls.specialization.name)
+        if ls.sub_specialization is not None:
+            names.append(ls.sub_specialization.name)
+    specializations = ", ".join(names)
+    return ". ".join(filter(None, [specializations, specializations, lawyer.bio]))
+
+
+class LawyerMatcher:
+    """
+    In-process vector index of verified lawyers, persisted as an append-only JSONL log
+    at MATCH_INDEX_PATH (one upsert with its embedding, or remove, per line).
+
+    Profile changes append a line; every worker tails the log before answering a query,
+    so updates made by one worker are picked up by the others without a rebuild. Once
+    superseded lines dominate, the worker noticing it rewrites the log with one line
+    per lawyer (no re-embedding). scripts/rebuild_match_index.py re-embeds everything
+    from the database, e.g. after changing MATCH_EMBEDDING_MODEL.
+
+    The async methods run on a small thread pool; the _underscored ones they call block.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        # Row i is the embedding of ids[i]; capacity grows by doubling
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self._offset = 0
+        self._lines = 0
+        self._inode: Optional[int] = None
+
+    # --- in-memory index -------------------------------------------------
+
+    def _apply(self, op: dict):
+        lawyer_id = op["id"]
+        row = self.rows.pop(lawyer_id, None)
+        if row is not None:
+            # Move the last row into the hole
+            last = len(self.ids) - 1
+            if row != last:
+                moved = self.ids[last]
+                self.ids[row] = moved
+                self.rows[moved] = row
+                self.matrix[row] = self.matrix[last]
+            self.ids.pop()
+
+        # Vectors of another model are not comparable; rebuild_match_index.py replaces them
+        if op["op"] == "upsert" and op.get("m") == settings.MATCH_EMBEDDING_MODEL:
+            vector = np.asarray(op["v"], dtype=np.float32)
+            count = len(self.ids)
+            if count == len(self.matrix):
+                grown = np.zeros((max(64, 2 * count), len(vector)), dtype=np.float32)
+                if count:
+                    grown[:count] = self.matrix[:count]
+                self.matrix = grown
+            self.matrix[count] = vector
+            self.ids.append(lawyer_id)
+            self.rows[lawyer_id] = count
+
+    # --- persistence ------------------------------------------------------
+
+    @contextmanager
+    def _file_lock(self):
+        """
+        Exclusive across processes: appends never land in a log being compacted away.
+        """
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _refresh(self):
+        """
+        Apply log lines appended since the last read (by this or another worker).
+        Reloads from scratch if the log was replaced by a compaction or rebuild.
+        """
+        try:
+            f = open(self.path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            # Stat the open file, not the path: it may be replaced meanwhile
+            stat = os.fstat(f.fileno())
+            if self._inode is not None and (stat.st_ino != self._inode or stat.st_size < self._offset):
+                self._reset()
+            self._inode = stat.st_ino
+            if stat.st_size == self._offset:
+                return
+            f.seek(self._offset)
+            while True:
+                line = f.readline()
+                if not line.endswith("\n"):
+                    # Partial line still being written; pick it up next time
+                    break
+                self._offset += len(line.encode("utf-8"))
+                if line.strip():
+                    self._lines += 1
+                    self._apply(json.loads(line))
+
+    def _needs_compaction(self) -> bool:
+        return self._lines >= COMPACT_MIN_LINES and self._lines > settings.MATCH_INDEX_COMPACT_RATIO * len(self.ids)
+
+    def _write_log(self, lines: Iterable[str]):
+        # Complete file under a temporary name, then an atomic swap
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, self.path)
+
+    def _compact(self):
+        """
+        Rewrite the log as one upsert per indexed lawyer. Runs under self._lock.
+        """
+        with self._file_lock():
+            # Another worker may have compacted first; lines appended since our last
+            # read are caught up, and the file lock keeps new ones out until the swap
+            self._refresh()
+            if not self._needs_compaction():
+                return
+            self._write_log(
+                json.dumps(self._upsert_op(lawyer_id, self.matrix[row]), separators=(",", ":")) + "\n"
+                for row, lawyer_id in enumerate(self.ids)
+            )
+            self._reset()
+            self._refresh()
+
+    def _append(self, ops: List[dict]):
+        if not ops:
+            return
+        data = "".join(json.dumps(op, separators=(",", ":")) + "\n" for op in ops)
+        with self._file_lock():
+            # O_APPEND + one write per batch keeps concurrent workers from interleaving
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data.encode("utf-8"))
+            finally:
+                os.close(fd)
+
+    @staticmethod
+    def _upsert_op(lawyer_id, vector: np.ndarray) -> dict:
+        return {
+            "op": "upsert",
+            "id": str(lawyer_id),
+            "m": settings.MATCH_EMBEDDING_MODEL,
+            "v": [round(float(w), 5) for w in vector],
+        }
+
+    def _upsert(self, documents: List[Tuple[str, str]]):
+        if not documents:
+            return
+        # Our own lines are applied by the next _refresh, like anyone else's
+        vectors = embed([text for _, text in documents])
+        self._append([self._upsert_op(lawyer_id, vector) for (lawyer_id, _), vector in zip(documents, vectors)])
+
+    def _query(self, text: str, top_k: int) -> List[Tuple[str, float]]:
+        query_vector = embed([text])[0]
+        with self._lock:
+            self._refresh()
+            if self._needs_compaction():
+                self._compact()
+            count = len(self.ids)
+            if not count:
+                return []
+            scores = self.matrix[:count] @ query_vector
+            k = min(top_k, count)
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            return [
+                (self.ids[row], float(scores[row]))
+                for row in best
+                if scores[row] >= settings.MATCH_MIN_SCORE
+            ]
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, partial(func, *args))
+
+    # --- public API ---------------------------------------------------------
+
+    async def remove(self, lawyer_id):
+        await self.remove_many([lawyer_id])
+
+    async def remove_many(self, lawyer_ids: Iterable):
+        await self._run(self._append, [{"op": "remove", "id": str(i)} for i in lawyer_ids])
+
+    async def upsert_lawyer(self, lawyer):
+        await self.upsert_lawyers([lawyer])
+
+    async def upsert_lawyers(self, lawyers: Iterable):
+        # Documents are read from the ORM objects here, on the event loop
+        await self._run(self._upsert, [(str(lawyer.id), lawyer_document(lawyer)) for lawyer in lawyers])
+
+    async def query(self, text: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Top-k (lawyer_id, cosine similarity) for a free-text description, best first,
+        leaving out lawyers below MATCH_MIN_SCORE.
+        """
+        return await self._run(self._query, text, top_k)
+
+    def rebuild(self, documents: Iterable[Tuple[str, str]], batch_size: int = 256):
+        """
+        Replace the whole index with (lawyer_id, text) pairs, re-embedding them and
+        writing a compacted log atomically. Blocking; for scripts.
+        """
+        documents = list(documents)
+        lines = []
+        for start in range(0, len(documents), batch_size):
+            batch = documents[start:start + batch_size]
+            vectors = embed([text for _, text in batch])
+            lines.extend(
+                json.dumps(self._upsert_op(lawyer_id, vector), separators=(",", ":")) + "\n"
+                for (lawyer_id, _), vector in zip(batch, vectors)
+            )
+        with self._lock, self._file_lock():
+            self._write_log(lines)
+            self._reset()
+            self._refresh()
+
+
+matcher = LawyerMatcher(settings.MATCH_INDEX_PATH)
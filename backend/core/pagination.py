@@ -0,0 +1,146 @@
+import base64
+import binascii
+import hashlib
+import json
+import uuid
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+# Header carrying the cursor for the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# (sort expression, descending) pairs, most significant first. The last key must be unique (the id).
+SortKeys = Sequence[Tuple[Any, bool]]
+
+
+def _dump(value: Any) -> list:
+    if isinstance(value, datetime):
+        return ["dt", value.isoformat()]
+    if isinstance(value, uuid.UUID):
+        return ["uuid", str(value)]
+    return ["v", value]
+
+
+def _load(item: list) -> Any:
+    if not isinstance(item, list):
+        raise ValueError("malformed value")
+    tag, value = item
+    if tag == "dt":
+        return datetime.fromisoformat(value)
+    if tag == "uuid":
+        return uuid.UUID(value)
+    return value
+
+
+def _sort_id(keys: SortKeys) -> str:
+    """
+    Short fingerprint of a sort order, so a cursor is only accepted by the order it came from.
+    """
+    spec = "|".join(f"{expr}:{'d' if desc else 'a'}" for expr, desc in keys)
+    return hashlib.sha256(spec.encode()).hexdigest()[:16]
+
+
+def _python_type(expr) -> Optional[type]:
+    try:
+        return expr.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _valid(value: Any, expected: Optional[type]) -> bool:
+    # NULL sort values are legitimate (e.g. a nullable column); they just match nothing
+    if value is None:
+        return True
+    if isinstance(value, bool) and expected is not bool:
+        return False
+    if expected is None:
+        return isinstance(value, (int, float, str))
+    if expected is float:
+        # JSON drops the distinction for whole numbers
+        return isinstance(value, (int, float))
+    return isinstance(value, expected)
+
+
+def encode_cursor(keys: SortKeys, values: Sequence[Any]) -> str:
+    """
+    Opaque, URL-safe cursor from the sort-key values of the last row of a page.
+    """
+    payload = {"s": _sort_id(keys), "v": [_dump(v) for v in values]}
+    raw = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: SortKeys) -> List[Any]:
+    """
+    Sort-key values from a cursor made by encode_cursor for the same `keys`.
+    Raises a 400 for anything else: a tampered cursor, or one from another sort order.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(payload, dict) or payload.get("s") != _sort_id(keys):
+            raise ValueError("cursor from another sort order")
+        items = payload["v"]
+        if not isinstance(items, list) or len(items) != len(keys):
+            raise ValueError("wrong number of values")
+        values = [_load(item) for item in items]
+    except (binascii.Error, ValueError, TypeError, KeyError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    for (expr, _), value in zip(keys, values):
+        if not _valid(value, _python_type(expr)):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def _after(keys: SortKeys, values: Sequence[Any]):
+    """
+    Predicate selecting rows strictly after `values` in the order given by `keys`.
+    """
+    directions = {desc for _, desc in keys}
+    if len(directions) == 1:
+        # Row-value comparison, answered directly by a composite index on the keys
+        columns = tuple_(*[expr for expr, _ in keys])
+        bound = tuple_(*values)
+        return columns < bound if directions.pop() else columns > bound
+
+    clauses = []
+    for i, (expr, desc) in enumerate(keys):
+        equal_prefix = [keys[j][0] == values[j] for j in range(i)]
+        step = expr < values[i] if desc else expr > values[i]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+async def fetch_page(
+    db: AsyncSession,
+    stmt: Select,
+    keys: SortKeys,
+    cursor: Optional[str],
+    limit: int,
+) -> Tuple[list, Optional[str]]:
+    """
+    Keyset pagination: seek past `cursor` instead of OFFSET, so page N costs the same as page one.
+
+    `stmt` must select a single entity. Returns the page and the cursor of the next page
+    (None when this is the last one).
+    """
+    if cursor:
+        stmt = stmt.where(_after(keys, decode_cursor(cursor, keys)))
+
+    stmt = stmt.add_columns(*[expr.label(f"_sort_{i}") for i, (expr, _) in enumerate(keys)])
+    stmt = stmt.order_by(*[expr.desc() if desc else expr.asc() for expr, desc in keys])
+    # One extra row tells us whether there is a next page
+    stmt = stmt.limit(limit + 1)
+
+    rows = (await db.execute(stmt)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = [row[0] for row in rows]
+    next_cursor = encode_cursor(keys, list(rows[-1][1:])) if has_more and rows else None
+    return items, next_cursor
@@ -0,0 +1,123 @@
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from core import cache
+from core.cache import TTLCache
+from core.config import settings
+from models.lawyer import Lawyer
+from models.user import User
+
+# Everything get_current_user callers read; the password hash never leaves the database
+_FIELDS = [column.key for column in User.__table__.columns if column.key != "hashed_password"]
+
+# In-process copies are kept short: another worker's invalidation only reaches them on expiry
+_local = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_LOCAL_TTL)
+
+
+def _key(user_id: uuid.UUID) -> str:
+    return f"principal:{user_id}"
+
+
+@dataclass
+class Principal:
+    """
+    The authenticated user together with their lawyer profile id (None for clients),
+    and the booking checks built on them.
+    """
+
+    user: User
+    lawyer_id: Optional[uuid.UUID] = None
+
+    def is_booking_client(self, booking) -> bool:
+        return booking.user_id == self.user.id
+
+    def is_booking_lawyer(self, booking) -> bool:
+        return self.lawyer_id is not None and booking.lawyer_id == self.lawyer_id
+
+    def is_booking_party(self, booking) -> bool:
+        return self.is_booking_client(booking) or self.is_booking_lawyer(booking)
+
+    def ensure_booking_party(self, booking, allow_superuser: bool = False) -> None:
+        if self.is_booking_party(booking) or (allow_superuser and self.user.is_superuser):
+            return
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+
+def _snapshot(user: User, lawyer_id: Optional[uuid.UUID]) -> dict:
+    data = {field: getattr(user, field) for field in _FIELDS}
+    data["id"] = str(user.id)
+    data["lawyer_id"] = str(lawyer_id) if lawyer_id else None
+    return data
+
+
+def _restore(data: dict) -> Principal:
+    fields = {field: data[field] for field in _FIELDS}
+    user = User(**{**fields, "id": uuid.UUID(data["id"])})
+    # Persistent-looking object with these values loaded, without a SELECT
+    make_transient_to_detached(user)
+    lawyer_id = data.get("lawyer_id")
+    return Principal(user, uuid.UUID(lawyer_id) if lawyer_id else None)
+
+
+async def load_principal(db: AsyncSession, user_id: uuid.UUID) -> Optional[Principal]:
+    """
+    The user behind an access token and their lawyer profile id: from the in-process
+    cache, then Redis, and only on a miss from the database (one joined query). A cached
+    user is attached to `db` without a query, so handlers can still modify and commit
+    it; hashed_password is not loaded on it.
+    """
+    data = _local.get(user_id)
+    if data is None and settings.PRINCIPAL_CACHE_REDIS:
+        data = await cache.get_json(_key(user_id))
+        if data is not None:
+            _local.set(user_id, data)
+
+    if data is None:
+        query = (
+            select(User, Lawyer.id)
+            .outerjoin(Lawyer, Lawyer.user_id == User.id)
+            .where(User.id == user_id)
+        )
+        row = (await db.execute(query)).first()
+        if row is None:
+            return None
+        user, lawyer_id = row
+        data = _snapshot(user, lawyer_id)
+        _local.set(user_id, data)
+        if settings.PRINCIPAL_CACHE_REDIS:
+            await cache.set_json(_key(user_id), data, settings.PRINCIPAL_CACHE_TTL)
+        return Principal(user, lawyer_id)
+
+    principal = _restore(data)
+    db.add(principal.user)
+    return principal
+
+
+async def load_user(db: AsyncSession, user_id: uuid.UUID) -> Optional[User]:
+    principal = await load_principal(db, user_id)
+    return principal.user if principal else None
+
+
+async def invalidate(*user_ids) -> None:
+    """
+    Forget cached users. Call after committing any change to a user row (deactivation,
+    user_type, verification...) or creating their lawyer profile. Other workers drop
+    their in-process copy within PRINCIPAL_CACHE_LOCAL_TTL seconds.
+    """
+    ids = [uuid.UUID(str(user_id)) for user_id in user_ids]
+    if not ids:
+        return
+    for user_id in ids:
+        _local.pop(user_id)
+    if settings.PRINCIPAL_CACHE_REDIS:
+        try:
+            await cache.redis.delete(*(_key(user_id) for user_id in ids))
+        except RedisError as e:
+            print(f"Cache invalidation error: {e}")
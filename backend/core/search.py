@@ -0,0 +1,354 @@
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select, update, delete, insert, func, or_, literal, literal_column, case, cast, Float, String, union_all
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import cache
+from models.user import User
+from models.lawyer import Lawyer, LawyerCourt, LawyerSpecialization, LawyerLocation
+from models.location import Court, District
+from models.specialization import Specialization
+
+# Text search configuration used both for building documents and parsing queries.
+# Must be a regconfig literal, a bound VARCHAR parameter does not resolve to to_tsvector(regconfig, text).
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+
+
+def _weighted(text_expr, weight: str):
+    vector = func.to_tsvector(SEARCH_CONFIG, func.coalesce(text_expr, ""))
+    return func.setweight(vector, literal_column(f"'{weight}'"), type_=TSVECTOR)
+
+
+def _document_parts():
+    """
+    Correlated subqueries that gather everything a lawyer can be searched by.
+    """
+    full_name = (
+        select(User.full_name)
+        .where(User.id == Lawyer.user_id)
+        .scalar_subquery()
+    )
+    court_names = (
+        select(func.string_agg(Court.name, " "))
+        .select_from(LawyerCourt)
+        .join(Court, Court.id == LawyerCourt.court_id)
+        .where(LawyerCourt.lawyer_id == Lawyer.id)
+        .scalar_subquery()
+    )
+    specialization_names = (
+        select(func.string_agg(Specialization.name, " "))
+        .select_from(LawyerSpecialization)
+        .join(Specialization, or_(
+            Specialization.id == LawyerSpecialization.specialization_id,
+            Specialization.id == LawyerSpecialization.sub_specialization_id,
+        ))
+        .where(LawyerSpecialization.lawyer_id == Lawyer.id)
+        .scalar_subquery()
+    )
+    return full_name, specialization_names, court_names
+
+
+async def refresh_search_documents(db: AsyncSession, lawyer_ids: Optional[Iterable] = None) -> None:
+    """
+    Rebuild search_text / search_vector for the given lawyers (or all lawyers).
+    Runs as a single UPDATE in the caller's transaction; the caller commits.
+    """
+    full_name, specialization_names, court_names = _document_parts()
+
+    search_vector = (
+        _weighted(full_name, "A")
+        .op("||")(_weighted(specialization_names, "B"))
+        .op("||")(_weighted(court_names, "C"))
+        .op("||")(_weighted(func.concat_ws(" ", Lawyer.bio, Lawyer.education), "D"))
+    )
+    search_text = func.concat_ws(
+        " ", full_name, specialization_names, court_names, Lawyer.bio, Lawyer.education
+    )
+
+    # Keep updated_at untouched: reindexing is not a profile change
+    stmt = update(Lawyer).values(
+        search_text=search_text, search_vector=search_vector, updated_at=Lawyer.updated_at
+    )
+    if lawyer_ids is not None:
+        ids = list(lawyer_ids)
+        if not ids:
+            return
+        stmt = stmt.where(Lawyer.id.in_(ids))
+
+    await db.execute(stmt.execution_options(synchronize_session=False))
+
+
+async def refresh_lawyer_locations(db: AsyncSession, lawyer_ids: Optional[Iterable] = None) -> None:
+    """
+    Recompute the lawyer -> district/state mapping from lawyer_courts for the given
+    lawyers (or everyone). Runs in the caller's transaction; the caller commits.
+    """
+    ids = list(lawyer_ids) if lawyer_ids is not None else None
+    if ids is not None and not ids:
+        return
+
+    clear = delete(LawyerLocation)
+    closure = (
+        select(LawyerCourt.lawyer_id, Court.district_id, District.state_id)
+        .join(Court, Court.id == LawyerCourt.court_id)
+        .join(District, District.id == Court.district_id)
+        .distinct()
+    )
+    if ids is not None:
+        clear = clear.where(LawyerLocation.lawyer_id.in_(ids))
+        closure = closure.where(LawyerCourt.lawyer_id.in_(ids))
+
+    await db.execute(clear.execution_options(synchronize_session=False))
+    await db.execute(
+        insert(LawyerLocation).from_select(["lawyer_id", "district_id", "state_id"], closure)
+    )
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def text_search_clause(query: str):
+    """
+    Condition matching lawyers against `query`. Order by search_rank(query).
+
+    Matches on full-text (stemmed words, weighted name > specialization > court > bio),
+    fuzzy word similarity (typos in names) and plain substring, all served by the
+    GIN indexes on lawyers.search_vector / lawyers.search_text.
+    """
+    query = query.strip()
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+    return or_(
+        Lawyer.search_vector.op("@@")(tsquery),
+        Lawyer.search_text.op("%>")(query),
+        Lawyer.search_text.ilike(f"%{_escape_like(query)}%"),
+    )
+
+
+def search_rank(query: str):
+    """
+    Relevance score for a query: full-text rank plus trigram word similarity.
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query.strip())
+    return (
+        func.ts_rank_cd(Lawyer.search_vector, tsquery, type_=Float)
+        + func.word_similarity(query.strip(), Lawyer.search_text, type_=Float)
+    )
+
+
+# Cache family for /search and /search/facets responses
+SEARCH_CACHE = "lawyer_search"
+
+
+def normalize_query(query: Optional[str]) -> Optional[str]:
+    """
+    Canonical form of a text query: lowercase, whitespace collapsed (matching is
+    case-insensitive). Search with this same string that keys the cache, so queries
+    sharing a cache entry also match the same rows.
+    """
+    if not query or not query.strip():
+        return None
+    return " ".join(query.lower().split())
+
+
+async def search_cache_key(kind: str, params: dict) -> Optional[str]:
+    """
+    Cache key for a search response. Includes the current cache generation,
+    read before querying Postgres so a concurrent invalidation is never masked.
+    None (do not cache) when the generation cannot be read.
+    """
+    gen = await cache.generation(SEARCH_CACHE)
+    if gen is None:
+        return None
+    return cache.make_key(f"{SEARCH_CACHE}:g{gen}:{kind}", params)
+
+
+async def invalidate_search_cache() -> None:
+    """
+    Drop every cached search result and facet count. Call after committing any change
+    to what search can see: verification status, profile, fee, courts, specializations.
+    """
+    await cache.bump_generation(SEARCH_CACHE)
+
+
+def normalize_languages(languages: Optional[Iterable[str]]) -> Optional[List[str]]:
+    """
+    Canonical language names ("bengali " -> "Bengali"), as stored on lawyer profiles.
+    """
+    if not languages:
+        return None
+    normalized = sorted({lang.strip().title() for lang in languages if lang and lang.strip()})
+    return normalized or None
+
+
+def lawyer_filters(
+    query: Optional[str] = None,
+    specialization_id: Optional[str] = None,
+    court_id: Optional[str] = None,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    min_rating: Optional[float] = None,
+    min_experience: Optional[int] = None,
+    languages: Optional[List[str]] = None,
+    languages_match: str = "any",
+    state_id: Optional[str] = None,
+    district_id: Optional[str] = None,
+) -> list:
+    """
+    WHERE clauses for a public lawyer search. Shared by results and facets so both
+    always describe the same set of lawyers.
+    """
+    clauses = [Lawyer.verification_status == "verified"]
+
+    if query and query.strip():
+        # Ranked full-text + trigram match over name, bio, education, courts and specializations
+        clauses.append(text_search_clause(query))
+    if min_price:
+        clauses.append(Lawyer.consultation_fee >= min_price)
+    if max_price:
+        clauses.append(Lawyer.consultation_fee <= max_price)
+    # Served from the precomputed aggregates, never by aggregating reviews
+    if min_rating:
+        clauses.append(Lawyer.rating_avg >= min_rating)
+    if min_experience:
+        clauses.append(Lawyer.years_experience >= min_experience)
+
+    # Array operators served by the GIN index on lawyers.languages
+    languages = normalize_languages(languages)
+    if languages:
+        if languages_match == "all":
+            clauses.append(Lawyer.languages.contains(languages))
+        else:
+            clauses.append(Lawyer.languages.overlap(languages))
+
+    # Location hierarchy resolved through the precomputed lawyer_locations closure
+    if district_id:
+        clauses.append(
+            select(LawyerLocation.lawyer_id)
+            .where(LawyerLocation.lawyer_id == Lawyer.id, LawyerLocation.district_id == district_id)
+            .exists()
+        )
+    if state_id:
+        clauses.append(
+            select(LawyerLocation.lawyer_id)
+            .where(LawyerLocation.lawyer_id == Lawyer.id, LawyerLocation.state_id == state_id)
+            .exists()
+        )
+
+    # Semi-joins for complex filters (court, specialization) so a lawyer is never returned twice
+    if court_id:
+        clauses.append(Lawyer.courts.any(LawyerCourt.court_id == court_id))
+    if specialization_id:
+        clauses.append(Lawyer.specializations.any(LawyerSpecialization.specialization_id == specialization_id))
+
+    return clauses
+
+
+def sort_keys(sort_by: str, query: Optional[str] = None) -> list:
+    """
+    Keyset sort keys for a search order. "relevance" needs a text query and
+    falls back to newest-first without one.
+    """
+    if sort_by == "rating":
+        return [(Lawyer.rating_avg, True), (Lawyer.rating_count, True), (Lawyer.id, True)]
+    if sort_by == "experience":
+        return [(Lawyer.years_experience, True), (Lawyer.id, True)]
+    if sort_by == "relevance" and query and query.strip():
+        return [(search_rank(query), True), (Lawyer.id, True)]
+    return [(Lawyer.created_at, True), (Lawyer.id, True)]
+
+
+# Consultation fee buckets (rupees) shown in the search sidebar; upper bound exclusive
+FEE_BUCKETS = [(0, 500), (500, 1000), (1000, 2000), (2000, 5000), (5000, None)]
+
+
+def _fee_bucket_label(low: int, high: Optional[int]) -> str:
+    return f"{low}-{high}" if high is not None else f"{low}+"
+
+
+async def compute_facets(db: AsyncSession, filters: list) -> Dict[str, object]:
+    """
+    Counts per specialization, court, language and fee bucket for the lawyers
+    matching `filters`, computed in a single round trip (one UNION ALL over a CTE).
+    """
+    matched = (
+        select(Lawyer.id, Lawyer.consultation_fee, Lawyer.languages)
+        .where(*filters)
+        .cte("matched")
+    )
+
+    total = select(
+        literal("total").label("facet"), literal("").label("value"),
+        literal("").label("label"), func.count().label("count"),
+    ).select_from(matched)
+
+    specializations = (
+        select(
+            literal("specialization"), cast(Specialization.id, String),
+            Specialization.name, func.count(func.distinct(matched.c.id)),
+        )
+        .select_from(matched)
+        .join(LawyerSpecialization, LawyerSpecialization.lawyer_id == matched.c.id)
+        .join(Specialization, Specialization.id == LawyerSpecialization.specialization_id)
+        .group_by(Specialization.id, Specialization.name)
+    )
+
+    courts = (
+        select(
+            literal("court"), cast(Court.id, String),
+            Court.name, func.count(func.distinct(matched.c.id)),
+        )
+        .select_from(matched)
+        .join(LawyerCourt, LawyerCourt.lawyer_id == matched.c.id)
+        .join(Court, Court.id == LawyerCourt.court_id)
+        .group_by(Court.id, Court.name)
+    )
+
+    spoken = select(func.unnest(matched.c.languages).label("language")).subquery("spoken")
+    languages = (
+        select(literal("language"), spoken.c.language, spoken.c.language, func.count())
+        .group_by(spoken.c.language)
+    )
+
+    bucket = case(
+        *[
+            (
+                (matched.c.consultation_fee >= low) if high is None
+                else (matched.c.consultation_fee >= low) & (matched.c.consultation_fee < high),
+                _fee_bucket_label(low, high),
+            )
+            for low, high in FEE_BUCKETS
+        ],
+        else_=None,
+    )
+    priced = select(bucket.label("bucket")).select_from(matched).subquery("priced")
+    fee_ranges = (
+        select(literal("fee"), priced.c.bucket, priced.c.bucket, func.count())
+        .where(priced.c.bucket.is_not(None))
+        .group_by(priced.c.bucket)
+    )
+
+    result = await db.execute(union_all(total, specializations, courts, languages, fee_ranges))
+
+    facets: Dict[str, object] = {
+        "total": 0, "specializations": [], "courts": [], "languages": [], "fee_ranges": [],
+    }
+    groups = {
+        "specialization": "specializations", "court": "courts",
+        "language": "languages", "fee": "fee_ranges",
+    }
+    for facet, value, label, count in result.all():
+        if facet == "total":
+            facets["total"] = count
+        else:
+            facets[groups[facet]].append({"value": value, "label": label, "count": count})
+
+    for name in ("specializations", "courts", "languages"):
+        facets[name].sort(key=lambda f: (-f["count"], f["label"]))
+    # Keep fee buckets in ascending order (including empty ones) for a stable sidebar
+    fee_counts = {f["value"]: f["count"] for f in facets["fee_ranges"]}
+    facets["fee_ranges"] = [
+        {"value": label, "label": label, "count": fee_counts.get(label, 0)}
+        for label in (_fee_bucket_label(low, high) for low, high in FEE_BUCKETS)
+    ]
+    return facets
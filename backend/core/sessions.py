@@ -0,0 +1,226 @@
+"""
+Refresh-token sessions.
+
+Each login opens a session, a Redis hash `session:<sid>` holding the user and the id
+(jti) of the one refresh token currently valid for it. /auth/refresh swaps that token
+for a new one atomically (rotation); presenting an already-rotated token means it was
+copied, so the whole session is revoked. The token rotated last stays usable for
+REFRESH_REUSE_GRACE_SECONDS, so concurrent refreshes (two tabs) are not mistaken for
+reuse: they get the current token instead. Sessions slide: every refresh extends them by
+REFRESH_TOKEN_EXPIRE_DAYS, so active clients never need the password (and bcrypt) again.
+
+Access tokens carry the session id. Revoking a session deletes the hash and records the
+id in the `revoked_sessions` sorted set (scored by revocation time) for as long as its
+access tokens can live. get_current_user checks that set through an in-process Bloom
+filter, so the common not-revoked case costs no Redis round trip.
+"""
+import asyncio
+import time
+import uuid
+from typing import Optional
+
+from fastapi import HTTPException, status
+from jose import jwt, JWTError
+from pydantic import ValidationError
+from redis.exceptions import RedisError
+
+from core import security
+from core.cache import BloomFilter, redis
+from core.config import settings
+from schemas.token import TokenPayload
+
+REVOKED_KEY = "revoked_sessions"
+# Tolerated clock difference between workers when syncing revocations
+SYNC_SLACK = 2
+
+# KEYS[1] session hash; ARGV: presented jti, new jti, now, ttl, grace seconds.
+# {1, jti to issue} rotated (or the previous token within the grace period),
+# {0} unknown session, {-1} token already rotated (reuse)
+_ROTATE = redis.register_script("""
+local current = redis.call('HGET', KEYS[1], 'jti')
+if not current then return {0} end
+if current == ARGV[1] then
+  redis.call('HSET', KEYS[1], 'jti', ARGV[2], 'prev_jti', ARGV[1], 'refreshed_at', ARGV[3])
+  redis.call('EXPIRE', KEYS[1], ARGV[4])
+  return {1, ARGV[2]}
+end
+local previous = redis.call('HMGET', KEYS[1], 'prev_jti', 'refreshed_at')
+if previous[1] == ARGV[1] and tonumber(ARGV[3]) - tonumber(previous[2]) <= tonumber(ARGV[5]) then
+  return {1, current}
+end
+return {-1}
+""")
+
+
+def _session_key(session_id: str) -> str:
+    return f"session:{session_id}"
+
+
+def _user_sessions_key(user_id) -> str:
+    return f"user_sessions:{user_id}"
+
+
+def _session_ttl() -> int:
+    return settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600
+
+
+def _revocation_retention() -> int:
+    # A revoked session only matters while its access tokens are still valid
+    return settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60 + 60
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex
+
+
+def issue_tokens(user_id, session_id: Optional[str], token_id: Optional[str]) -> dict:
+    return {
+        "access_token": security.create_access_token(user_id, session_id=session_id),
+        "refresh_token": security.create_refresh_token(user_id, session_id, token_id),
+        "token_type": "bearer",
+    }
+
+
+async def create_session(user_id) -> dict:
+    """
+    Open a session and return its first token pair. Without Redis the tokens are still
+    issued, but the refresh token will be refused, so the client simply logs in again.
+    """
+    session_id, token_id = _new_id(), _new_id()
+    now = int(time.time())
+    try:
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(_session_key(session_id), mapping={
+                "user_id": str(user_id), "jti": token_id, "created_at": now, "refreshed_at": now,
+            })
+            pipe.expire(_session_key(session_id), _session_ttl())
+            pipe.sadd(_user_sessions_key(user_id), session_id)
+            pipe.expire(_user_sessions_key(user_id), _session_ttl())
+            await pipe.execute()
+    except RedisError as e:
+        print(f"Session store Error: {e}")
+    return issue_tokens(user_id, session_id, token_id)
+
+
+def decode_refresh_token(token: str) -> TokenPayload:
+    try:
+        payload = TokenPayload(**jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]))
+    except (JWTError, ValidationError):
+        payload = None
+    if not payload or payload.type != "refresh" or not payload.sid or not payload.jti or not payload.sub:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    return payload
+
+
+async def rotate_session(payload: TokenPayload) -> dict:
+    """
+    Exchange a decoded refresh token for a new token pair of the same session.
+    """
+    try:
+        outcome = await _ROTATE(
+            keys=[_session_key(payload.sid)],
+            args=[payload.jti, _new_id(), int(time.time()), _session_ttl(), settings.REFRESH_REUSE_GRACE_SECONDS],
+        )
+    except RedisError as e:
+        print(f"Session store Error: {e}")
+        raise HTTPException(status_code=503, detail="Sessions are temporarily unavailable")
+
+    if outcome[0] == -1:
+        # Someone refreshed with a token that was already exchanged: assume it leaked
+        await revoke_session(payload.sid, payload.sub)
+    if outcome[0] != 1:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Session expired or revoked")
+    return issue_tokens(payload.sub, payload.sid, outcome[1])
+
+
+async def revoke_session(session_id: str, user_id=None) -> None:
+    """
+    End a session: its refresh token stops working at once, its access tokens on every
+    worker within REVOCATION_SYNC_SECONDS.
+    """
+    await _revoke_sessions([session_id], user_id)
+
+
+async def revoke_user_sessions(user_id) -> int:
+    """
+    End every session of a user (logout everywhere). Returns how many were open.
+    """
+    try:
+        session_ids = list(await redis.smembers(_user_sessions_key(user_id)))
+    except RedisError as e:
+        print(f"Session store Error: {e}")
+        raise HTTPException(status_code=503, detail="Sessions are temporarily unavailable")
+    await _revoke_sessions(session_ids, user_id)
+    return len(session_ids)
+
+
+async def _revoke_sessions(session_ids: list, user_id=None) -> None:
+    # One pipeline however many sessions
+    if not session_ids:
+        return
+    now = time.time()
+    _revocations.bloom.update(session_ids)
+    try:
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.delete(*(_session_key(session_id) for session_id in session_ids))
+            if user_id is not None:
+                pipe.srem(_user_sessions_key(user_id), *session_ids)
+            pipe.zadd(REVOKED_KEY, dict.fromkeys(session_ids, now))
+            pipe.zremrangebyscore(REVOKED_KEY, "-inf", now - _revocation_retention())
+            await pipe.execute()
+    except RedisError as e:
+        print(f"Session store Error: {e}")
+        raise HTTPException(status_code=503, detail="Sessions are temporarily unavailable")
+
+
+class _RevocationFilter:
+    """
+    Per-worker Bloom filter of recently revoked session ids, kept in sync with
+    REVOKED_KEY by an incremental read every REVOCATION_SYNC_SECONDS, and rebuilt from
+    scratch once its oldest entries can no longer matter.
+    """
+
+    def __init__(self):
+        self.bloom = self._empty()
+        self.built_at = 0.0
+        self.synced_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _empty() -> BloomFilter:
+        return BloomFilter(settings.REVOCATION_BLOOM_CAPACITY, settings.REVOCATION_BLOOM_ERROR_RATE)
+
+    async def sync(self) -> None:
+        now = time.time()
+        if now - self.synced_at < settings.REVOCATION_SYNC_SECONDS or self._lock.locked():
+            return
+        async with self._lock:
+            rebuild = now - self.built_at > _revocation_retention()
+            since = now - _revocation_retention() if rebuild else self.synced_at - SYNC_SLACK
+            try:
+                session_ids = await redis.zrangebyscore(REVOKED_KEY, since, "+inf")
+            except RedisError as e:
+                print(f"Session store Error: {e}")
+                session_ids = None
+            # Also after a failure, so a Redis outage does not add a round trip to every request
+            self.synced_at = now
+            if session_ids is None:
+                return
+            if rebuild:
+                self.bloom, self.built_at = self._empty(), now
+            self.bloom.update(session_ids)
+
+
+_revocations = _RevocationFilter()
+
+
+async def is_session_revoked(session_id: str) -> bool:
+    await _revocations.sync()
+    if session_id not in _revocations.bloom:
+        return False
+    # Revoked or a false positive: only now ask Redis
+    try:
+        return await redis.zscore(REVOKED_KEY, session_id) is not None
+    except RedisError as e:
+        print(f"Session store Error: {e}")
+        return True
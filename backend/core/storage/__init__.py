@@ -0,0 +1,56 @@
+import importlib
+from functools import lru_cache
+from typing import Dict, Iterable
+
+from core.cache import TTLCache
+from core.config import settings
+from core.storage.base import StorageBackend, run_blocking, upload_key
+
+# STORAGE_BACKEND -> module with a create() factory. Imported lazily, so only the
+# selected backend's SDK is loaded and no client is created at import time.
+BACKENDS = {
+    "local": "core.storage.local",
+    "s3": "core.storage.s3",
+    "cloudinary": "core.storage.cloudinary_backend",
+}
+
+# Signed links are reused until a quarter of their lifetime is left, so a link handed
+# out from the cache is always valid for at least SIGNED_URL_TTL / 4 more seconds.
+_signed_urls = TTLCache(
+    maxsize=settings.SIGNED_URL_CACHE_SIZE, ttl=settings.SIGNED_URL_TTL - settings.SIGNED_URL_TTL // 4
+)
+
+def backend_name() -> str:
+    if settings.STORAGE_BACKEND:
+        return settings.STORAGE_BACKEND
+    # Deployments predating STORAGE_BACKEND
+    return "cloudinary" if settings.USE_CLOUDINARY else "s3"
+
+@lru_cache(maxsize=None)
+def get_backend(name: str = None) -> StorageBackend:
+    name = name or backend_name()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown STORAGE_BACKEND {name!r}, expected one of {sorted(BACKENDS)}")
+    return importlib.import_module(BACKENDS[name]).create()
+
+def generate_file_urls(keys: Iterable[str]) -> Dict[str, str]:
+    """
+    Links for a batch of stored values (e.g. every document of a page of lawyers).
+    URLs (Cloudinary) are returned as-is; keys are signed by the configured backend,
+    reusing cached signatures, so repeated listings cost almost nothing to sign.
+    """
+    backend = get_backend()
+    urls = {}
+    for key in set(filter(None, keys)):
+        if key.startswith("http"):
+            urls[key] = key
+        elif backend.signed_url_ttl is None:
+            urls[key] = backend.url(key)
+        else:
+            url = _signed_urls.get(key)
+            if url is None:
+                url = backend.url(key)
+                if url:
+                    _signed_urls.set(key, url)
+            urls[key] = url
+    return urls
@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import os
+import re
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import BinaryIO, Optional
+
+from core.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+
+_EXTENSION_RE = re.compile(r"^\.[a-z0-9]{1,8}$")
+
+# Storage SDKs and file I/O are blocking. They run on this pool so they never stall
+# the event loop, and its size caps concurrent transfers per worker.
+_upload_executor = ThreadPoolExecutor(
+    max_workers=settings.STORAGE_UPLOAD_WORKERS, thread_name_prefix="storage-upload"
+)
+
+async def run_blocking(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_upload_executor, partial(func, *args, **kwargs))
+
+
+def content_digest(file: BinaryIO) -> str:
+    """
+    SHA-256 of a seekable file, read in chunks; rewinds it for the actual upload.
+    """
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(partial(file.read, CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def _extension(filename: Optional[str]) -> str:
+    extension = os.path.splitext(filename or "")[1].lower()
+    return extension if _EXTENSION_RE.match(extension) else ""
+
+
+def content_key(directory: str, digest: str, filename: Optional[str]) -> str:
+    """
+    Content-addressed object key: identical files map to the same key.
+    """
+    return f"{directory.strip('/')}/{digest[:2]}/{digest}{_extension(filename)}"
+
+
+def upload_key(directory: str, filename: Optional[str]) -> str:
+    """
+    Fresh key for a direct upload, whose content is not known when the key is issued.
+    """
+    return f"{directory.strip('/')}/{uuid.uuid4().hex}{_extension(filename)}"
+
+
+class UploadSink(ABC):
+    """
+    Receives an upload chunk by chunk while it streams in (see core.ingest).
+    The key is only chosen at commit, once the content hash is known.
+    """
+
+    @abstractmethod
+    async def write(self, chunk: bytes) -> None:
+        ...
+
+    @abstractmethod
+    async def commit(self, directory: str, digest: str, filename: Optional[str]) -> str:
+        """
+        Publish the content under its content-addressed key; returns the value to store.
+        """
+
+    @abstractmethod
+    async def abort(self) -> None:
+        ...
+
+
+class StorageBackend(ABC):
+    """
+    Where uploaded documents live. `save` returns the value stored on the row
+    (an object key, or a public URL for Cloudinary); `url` turns it into a link.
+    """
+
+    name: str
+    # Lifetime of links returned by url(); None when they do not expire
+    signed_url_ttl: Optional[int] = None
+
+    @abstractmethod
+    async def save(self, file: BinaryIO, directory: str, filename: Optional[str], content_type: Optional[str]) -> str:
+        ...
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        ...
+
+    @abstractmethod
+    async def read(self, key: str) -> bytes:
+        """
+        Contents of a stored object, for server-side processing (e.g. photo derivatives).
+        """
+
+    @abstractmethod
+    def open_sink(self, content_type: Optional[str]) -> UploadSink:
+        """
+        A sink streaming a new upload towards this backend with constant memory.
+        """
+
+    @abstractmethod
+    def presign_upload(self, key: str, content_type: str, max_bytes: int, expires_in: int) -> dict:
+        """
+        Parameters for the client to upload straight to storage, without going through
+        the API: {"method", "url", "fields" (form fields, for POST), "headers"}.
+        """
+
+    @abstractmethod
+    async def confirm_upload(self, key: str) -> Optional[str]:
+        """
+        The value to store on the row once a direct upload to `key` has finished,
+        or None if nothing was uploaded there.
+        """
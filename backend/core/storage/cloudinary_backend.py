@@ -0,0 +1,130 @@
+import os
+import tempfile
+import time
+from typing import BinaryIO, Optional
+
+import httpx
+import cloudinary
+import cloudinary.api
+import cloudinary.exceptions
+import cloudinary.uploader
+import cloudinary.utils
+
+from core.config import settings
+from core.storage.base import StorageBackend, UploadSink, content_digest, run_blocking
+
+
+class CloudinaryStorage(StorageBackend):
+    """
+    Cloudinary; rows store the public secure URL.
+    The content hash is used as public_id without overwrite, so an identical document
+    maps to the existing asset instead of creating a new one.
+    """
+
+    name = "cloudinary"
+
+    def __init__(self):
+        self._configured = False
+
+    def _configure(self):
+        # Configured on first use rather than at import time
+        if not self._configured:
+            cloudinary.config(
+                cloud_name=settings.CLOUDINARY_CLOUD_NAME,
+                api_key=settings.CLOUDINARY_API_KEY,
+                api_secret=settings.CLOUDINARY_API_SECRET
+            )
+            self._configured = True
+
+    def _store(self, file: BinaryIO, directory: str, digest: Optional[str] = None) -> str:
+        self._configure()
+        result = cloudinary.uploader.upload(
+            file,
+            folder=f"legal_booking/{directory.strip('/')}",
+            public_id=digest or content_digest(file),
+            overwrite=False,
+            resource_type="auto"
+        )
+        return result.get("secure_url")
+
+    async def save(self, file: BinaryIO, directory: str, filename: Optional[str], content_type: Optional[str]) -> str:
+        try:
+            return await run_blocking(self._store, file, directory)
+        except Exception as e:
+            print(f"Cloudinary Upload Error: {e}")
+            raise e
+
+    def url(self, key: str) -> str:
+        return key
+
+    def open_sink(self, content_type: Optional[str]) -> UploadSink:
+        return CloudinarySink(self)
+
+    async def read(self, key: str) -> bytes:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(key)
+            response.raise_for_status()
+            return response.content
+
+    @staticmethod
+    def _public_id(key: str) -> str:
+        return f"legal_booking/{os.path.splitext(key)[0]}"
+
+    def presign_upload(self, key: str, content_type: str, max_bytes: int, expires_in: int) -> dict:
+        # Signed upload parameters. Cloudinary signatures cannot carry a size limit or
+        # expiry of their own (signed timestamps are accepted for about an hour);
+        # enforce size with an upload preset if needed.
+        self._configure()
+        params = {"public_id": self._public_id(key), "timestamp": int(time.time())}
+        params["signature"] = cloudinary.utils.api_sign_request(params, settings.CLOUDINARY_API_SECRET)
+        params["api_key"] = settings.CLOUDINARY_API_KEY
+        return {
+            "method": "POST",
+            "url": f"https://api.cloudinary.com/v1_1/{settings.CLOUDINARY_CLOUD_NAME}/auto/upload",
+            "fields": {k: str(v) for k, v in params.items()},
+            "headers": {},
+        }
+
+    def _find(self, key: str) -> Optional[str]:
+        self._configure()
+        # "auto" uploads land as image (photos, PDFs) or raw (everything else)
+        for resource_type in ("image", "raw"):
+            try:
+                return cloudinary.api.resource(self._public_id(key), resource_type=resource_type)["secure_url"]
+            except cloudinary.exceptions.NotFound:
+                continue
+        return None
+
+    async def confirm_upload(self, key: str) -> Optional[str]:
+        return await run_blocking(self._find, key)
+
+
+class CloudinarySink(UploadSink):
+    """
+    Cloudinary only takes whole files, so chunks are spooled to a local temp file
+    (constant memory) and uploaded at commit.
+    """
+
+    def __init__(self, backend: CloudinaryStorage):
+        self.backend = backend
+        self.tmp = tempfile.TemporaryFile()
+
+    async def write(self, chunk: bytes) -> None:
+        await run_blocking(self.tmp.write, chunk)
+
+    async def commit(self, directory: str, digest: str, filename: Optional[str]) -> str:
+        try:
+            self.tmp.seek(0)
+            return await run_blocking(self.backend._store, self.tmp, directory, digest)
+        except Exception as e:
+            print(f"Cloudinary Upload Error: {e}")
+            raise e
+        finally:
+            self.tmp.close()
+
+    async def abort(self) -> None:
+        self.tmp.close()
+
+
+def create() -> CloudinaryStorage:
+    return CloudinaryStorage()
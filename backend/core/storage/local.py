@@ -0,0 +1,159 @@
+import hashlib
+import hmac
+import os
+import tempfile
+import time
+from typing import AsyncIterator, BinaryIO, Optional
+from urllib.parse import quote, urlencode
+
+from core.config import settings
+from core.storage.base import StorageBackend, UploadSink, CHUNK_SIZE, content_key, run_blocking
+
+
+class LocalStorage(StorageBackend):
+    """
+    Content-addressed files under LOCAL_STORAGE_DIR (served by main.py at /static).
+
+    Files are named by their SHA-256, so an identical document uploaded twice is stored
+    once. Writes go to a temporary file that is renamed into place, so readers never see
+    a partial file. No network involved, which also makes it the benchmarking backend.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str, base_url: str):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def temp_file(self):
+        # Same filesystem as the final location, so publishing is an atomic rename
+        tmp_dir = os.path.join(self.root, ".tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False)
+
+    def publish(self, tmp_name: str, key: str, replace: bool = False) -> str:
+        """
+        Move a finished temp file to `key`. Content-addressed keys that already exist
+        hold the same bytes, so the temp file is simply dropped.
+        """
+        path = self.path(key)
+        if not replace and os.path.exists(path):
+            os.unlink(tmp_name)
+            return key
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+        return key
+
+    def _store(self, file: BinaryIO, directory: str, filename: Optional[str]) -> str:
+        # Hash while copying, so the file is read only once
+        digest = hashlib.sha256()
+        file.seek(0)
+        with self.temp_file() as tmp:
+            for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                tmp.write(chunk)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        return self.publish(tmp.name, content_key(directory, digest.hexdigest(), filename))
+
+    async def save(self, file: BinaryIO, directory: str, filename: Optional[str], content_type: Optional[str]) -> str:
+        return await run_blocking(self._store, file, directory, filename)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def open_sink(self, content_type: Optional[str]) -> UploadSink:
+        return LocalSink(self)
+
+    def _read(self, key: str) -> bytes:
+        with open(self.path(key), "rb") as f:
+            return f.read()
+
+    async def read(self, key: str) -> bytes:
+        return await run_blocking(self._read, key)
+
+    # --- direct uploads: a signed PUT to api/v1/endpoints/uploads.py ------------
+
+    @staticmethod
+    def _signature(key: str, expires: int, max_bytes: int, content_type: str) -> str:
+        message = f"{key}\n{expires}\n{max_bytes}\n{content_type}".encode()
+        return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+    def verify_signature(self, key: str, expires: int, max_bytes: int, content_type: str, signature: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._signature(key, expires, max_bytes, content_type), signature)
+
+    def presign_upload(self, key: str, content_type: str, max_bytes: int, expires_in: int) -> dict:
+        expires = int(time.time()) + expires_in
+        query = urlencode({
+            "expires": expires,
+            "max_bytes": max_bytes,
+            "signature": self._signature(key, expires, max_bytes, content_type),
+        })
+        return {
+            "method": "PUT",
+            "url": f"{settings.API_V1_STR}/uploads/local/{quote(key)}?{query}",
+            "fields": {},
+            "headers": {"Content-Type": content_type},
+        }
+
+    async def write_stream(self, key: str, chunks: AsyncIterator[bytes], max_bytes: int) -> int:
+        """
+        Write a request body to `key` (temp file + atomic rename). Raises ValueError past max_bytes.
+        """
+        tmp = self.temp_file()
+        size = 0
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValueError("Upload too large")
+                await run_blocking(tmp.write, chunk)
+            tmp.close()
+            self.publish(tmp.name, key, replace=True)
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+        return size
+
+    async def confirm_upload(self, key: str) -> Optional[str]:
+        return key if os.path.isfile(self.path(key)) else None
+
+
+class LocalSink(UploadSink):
+    """
+    Streams into a temp file next to the store; commit is a rename (or a no-op for duplicates).
+    """
+
+    def __init__(self, backend: LocalStorage):
+        self.backend = backend
+        self.tmp = backend.temp_file()
+
+    async def write(self, chunk: bytes) -> None:
+        await run_blocking(self.tmp.write, chunk)
+
+    def _commit(self, key: str) -> str:
+        self.tmp.flush()
+        os.fsync(self.tmp.fileno())
+        self.tmp.close()
+        return self.backend.publish(self.tmp.name, key)
+
+    async def commit(self, directory: str, digest: str, filename: Optional[str]) -> str:
+        return await run_blocking(self._commit, content_key(directory, digest, filename))
+
+    async def abort(self) -> None:
+        self.tmp.close()
+        try:
+            os.unlink(self.tmp.name)
+        except FileNotFoundError:
+            pass
+
+
+def create() -> LocalStorage:
+    return LocalStorage(settings.LOCAL_STORAGE_DIR, settings.LOCAL_STORAGE_URL)
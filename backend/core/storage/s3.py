@@ -0,0 +1,178 @@
+import uuid
+from functools import cached_property
+from typing import BinaryIO, List, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+from core.config import settings
+from core.storage.base import StorageBackend, UploadSink, content_digest, content_key, run_blocking
+
+# Multipart part size for streamed uploads (S3 minimum is 5 MB); bounds memory per upload
+PART_SIZE = 8 * 1024 * 1024
+
+
+class S3Storage(StorageBackend):
+    """
+    Private S3 bucket; rows store object keys and links are presigned on demand.
+    Keys are content-addressed, so re-uploading an identical document is a HEAD request.
+    """
+
+    name = "s3"
+
+    def __init__(self, bucket: str, signed_url_ttl: int):
+        self.bucket = bucket
+        self.signed_url_ttl = signed_url_ttl
+
+    @cached_property
+    def client(self):
+        # Created on first use rather than at import time
+        return boto3.client(
+            's3',
+            aws_access_key_id=settings.AWS_ACCESS_KEY,
+            aws_secret_access_key=settings.AWS_SECRET_KEY,
+            region_name=settings.AWS_REGION
+        )
+
+    def _exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def _store(self, file: BinaryIO, directory: str, filename: Optional[str], content_type: Optional[str]) -> str:
+        key = content_key(directory, content_digest(file), filename)
+        if self._exists(key):
+            return key
+        extra_args = {'ContentType': content_type} if content_type else None
+        self.client.upload_fileobj(file, self.bucket, key, ExtraArgs=extra_args)
+        return key
+
+    async def save(self, file: BinaryIO, directory: str, filename: Optional[str], content_type: Optional[str]) -> str:
+        try:
+            return await run_blocking(self._store, file, directory, filename, content_type)
+        except ClientError as e:
+            print(f"Error uploading file to S3: {e}")
+            raise e
+
+    def _read(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    async def read(self, key: str) -> bytes:
+        return await run_blocking(self._read, key)
+
+    def open_sink(self, content_type: Optional[str]) -> UploadSink:
+        return S3Sink(self, content_type)
+
+    def presign_upload(self, key: str, content_type: str, max_bytes: int, expires_in: int) -> dict:
+        # Presigned POST: the policy pins the key and content type and caps the size
+        post = self.client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=key,
+            Fields={"Content-Type": content_type},
+            Conditions=[{"Content-Type": content_type}, ["content-length-range", 1, max_bytes]],
+            ExpiresIn=expires_in
+        )
+        return {"method": "POST", "url": post["url"], "fields": post["fields"], "headers": {}}
+
+    async def confirm_upload(self, key: str) -> Optional[str]:
+        return key if await run_blocking(self._exists, key) else None
+
+    def url(self, key: str) -> str:
+        try:
+            return self.client.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': self.bucket, 'Key': key},
+                ExpiresIn=self.signed_url_ttl
+            )
+        except ClientError as e:
+            print(f"Error generating presigned URL: {e}")
+            return ""
+
+
+class S3Sink(UploadSink):
+    """
+    Streams to S3 holding at most one part in memory.
+
+    Uploads smaller than a part are sent with a single PUT at commit. Larger ones go
+    to a temporary key as a multipart upload and are copied server-side to their
+    content-addressed key at commit. If that key already exists, nothing is stored twice.
+    """
+
+    def __init__(self, backend: S3Storage, content_type: Optional[str]):
+        self.backend = backend
+        self.content_type = content_type
+        self.buffer = bytearray()
+        self.tmp_key = f"tmp/uploads/{uuid.uuid4().hex}"
+        self.upload_id: Optional[str] = None
+        self.parts: List[dict] = []
+
+    @property
+    def client(self):
+        return self.backend.client
+
+    def _extra(self) -> dict:
+        return {"ContentType": self.content_type} if self.content_type else {}
+
+    def _upload_part(self):
+        if self.upload_id is None:
+            self.upload_id = self.client.create_multipart_upload(
+                Bucket=self.backend.bucket, Key=self.tmp_key, **self._extra()
+            )["UploadId"]
+        number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.backend.bucket, Key=self.tmp_key, UploadId=self.upload_id,
+            PartNumber=number, Body=bytes(self.buffer)
+        )
+        self.parts.append({"PartNumber": number, "ETag": response["ETag"]})
+        self.buffer.clear()
+
+    async def write(self, chunk: bytes) -> None:
+        self.buffer.extend(chunk)
+        if len(self.buffer) >= PART_SIZE:
+            await run_blocking(self._upload_part)
+
+    def _commit(self, key: str) -> str:
+        bucket = self.backend.bucket
+        if self.backend._exists(key):
+            self._abort()
+            return key
+        if self.upload_id is None:
+            self.client.put_object(Bucket=bucket, Key=key, Body=bytes(self.buffer), **self._extra())
+            return key
+
+        if self.buffer:
+            self._upload_part()
+        self.client.complete_multipart_upload(
+            Bucket=bucket, Key=self.tmp_key, UploadId=self.upload_id, MultipartUpload={"Parts": self.parts}
+        )
+        self.upload_id = None
+        self.client.copy_object(Bucket=bucket, Key=key, CopySource={"Bucket": bucket, "Key": self.tmp_key})
+        self.client.delete_object(Bucket=bucket, Key=self.tmp_key)
+        return key
+
+    async def commit(self, directory: str, digest: str, filename: Optional[str]) -> str:
+        try:
+            return await run_blocking(self._commit, content_key(directory, digest, filename))
+        except ClientError as e:
+            print(f"Error uploading file to S3: {e}")
+            raise e
+
+    def _abort(self):
+        self.buffer.clear()
+        if self.upload_id is not None:
+            self.client.abort_multipart_upload(Bucket=self.backend.bucket, Key=self.tmp_key, UploadId=self.upload_id)
+            self.upload_id = None
+
+    async def abort(self) -> None:
+        try:
+            await run_blocking(self._abort)
+        except ClientError as e:
+            print(f"Error aborting S3 upload: {e}")
+
+
+def create() -> S3Storage:
+    return S3Storage(settings.AWS_S3_BUCKET, settings.SIGNED_URL_TTL)
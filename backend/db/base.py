@@ -4,7 +4,7 @@ from db.base_class import Base
 from models.user import User
 from models.location import State, District, Court, PoliceStation
 from models.specialization import Specialization
-from models.lawyer import Lawyer, LawyerCourt, LawyerSpecialization
+from models.lawyer import Lawyer, LawyerCourt, LawyerSpecialization, LawyerLocation
 from models.booking import Booking, BookingHistory
 from models.payment import Payment, Escrow
 from models.consultation import Consultation
@@ -1,7 +1,9 @@
 from fastapi import FastAPI
+from sqlalchemy import text
 from fastapi.middleware.cors import CORSMiddleware
 from core.config import settings
 from api.v1.api import api_router
+from core.pagination import NEXT_CURSOR_HEADER
 from db.session import engine
 from db.base import Base
 
@@ -18,6 +20,7 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
 
 @app.get("/")
@@ -30,10 +33,12 @@ import os
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 # Mount static directory for local storage
-os.makedirs("static", exist_ok=True)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+os.makedirs(settings.LOCAL_STORAGE_DIR, exist_ok=True)
+app.mount("/static", StaticFiles(directory=settings.LOCAL_STORAGE_DIR), name="static")
 
 @app.on_event("startup")
 async def startup_event():
     async with engine.begin() as conn:
+        # Trigram operator classes are needed by the lawyer search indexes
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
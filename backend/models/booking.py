@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Text, ForeignKey, DateTime, func
+from sqlalchemy import Column, String, Integer, Text, ForeignKey, DateTime, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 # from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -39,6 +39,12 @@ class Booking(Base):
     payment = relationship("Payment", back_populates="booking", uselist=False)
     history = relationship("BookingHistory", back_populates="booking", cascade="all, delete-orphan")
 
+    # Keyset pagination of each party's bookings (newest first)
+    __table_args__ = (
+        Index("ix_bookings_user_created_id", "user_id", "created_at", "id"),
+        Index("ix_bookings_lawyer_created_id", "lawyer_id", "created_at", "id"),
+    )
+
 class BookingHistory(Base):
     __tablename__ = "booking_history"
 
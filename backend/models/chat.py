@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, func, Text
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Index, func, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -16,3 +16,5 @@ class Message(Base):
     
     booking = relationship("Booking", backref="messages")
     sender = relationship("User")
+
+    __table_args__ = (Index('ix_messages_booking_timestamp_id', 'booking_id', 'timestamp', 'id'),)
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Integer, Text, ForeignKey, ARRAY, DateTime, UniqueConstraint
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, Float, Text, ForeignKey, DateTime, UniqueConstraint, Index
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR, ARRAY
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 import uuid
 from db.base_class import Base
@@ -24,6 +24,9 @@ class Lawyer(Base):
     bar_council_certificate_url = Column(String, nullable=False)
     id_proof_url = Column(String, nullable=False)
     profile_photo_url = Column(String, nullable=True)
+    # Small WebP renditions of the profile photo, generated in the background by core.images
+    profile_photo_thumb_url = Column(String, nullable=True)
+    profile_photo_card_url = Column(String, nullable=True)
     
     verified_at = Column(DateTime(timezone=True), nullable=True)
     verified_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
@@ -31,12 +34,41 @@ class Lawyer(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+    # Review aggregates, kept in step with `reviews` by core.lawyers.record_review
+    # (rebuild with scripts/rebuild_ratings.py)
+    rating_count = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_sum = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_avg = Column(Float, default=0, server_default="0", nullable=False)
+    rating_1_count = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_2_count = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_3_count = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_4_count = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_5_count = Column(Integer, default=0, server_default="0", nullable=False)
+
+    # Denormalized search document (name, specializations, courts, bio, education).
+    # Maintained by core.search.refresh_search_documents, never written directly.
+    search_text = deferred(Column(Text, nullable=True))
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
+
     user = relationship("User", foreign_keys=[user_id], backref="lawyer_profile")
     verifier = relationship("User", foreign_keys=[verified_by])
     
     courts = relationship("LawyerCourt", back_populates="lawyer", cascade="all, delete-orphan")
     specializations = relationship("LawyerSpecialization", back_populates="lawyer", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Default search order (newest verified lawyers first), keyset-paginated
+        Index("ix_lawyers_status_created_id", "verification_status", "created_at", "id"),
+        Index("ix_lawyers_status_rating_id", "verification_status", "rating_avg", "rating_count", "id"),
+        Index("ix_lawyers_status_experience_id", "verification_status", "years_experience", "id"),
+        Index("ix_lawyers_languages", "languages", postgresql_using="gin"),
+        Index("ix_lawyers_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_lawyers_search_text_trgm", "search_text",
+            postgresql_using="gin", postgresql_ops={"search_text": "gin_trgm_ops"}
+        ),
+    )
+
 class LawyerCourt(Base):
     __tablename__ = "lawyer_courts"
 
@@ -64,3 +96,20 @@ class LawyerSpecialization(Base):
     sub_specialization = relationship("Specialization", foreign_keys=[sub_specialization_id])
 
     __table_args__ = (UniqueConstraint('lawyer_id', 'specialization_id', 'sub_specialization_id', name='uq_lawyer_spec'),)
+
+class LawyerLocation(Base):
+    """
+    Precomputed lawyer -> district -> state closure of lawyer_courts, so location
+    search never joins courts/districts/states. Rows are derived data: rebuild them
+    with core.search.refresh_lawyer_locations whenever a lawyer's courts change.
+    """
+    __tablename__ = "lawyer_locations"
+
+    lawyer_id = Column(UUID(as_uuid=True), ForeignKey("lawyers.id", ondelete="CASCADE"), primary_key=True)
+    district_id = Column(UUID(as_uuid=True), ForeignKey("districts.id", ondelete="CASCADE"), primary_key=True)
+    state_id = Column(UUID(as_uuid=True), ForeignKey("states.id", ondelete="CASCADE"), nullable=False)
+
+    __table_args__ = (
+        Index("ix_lawyer_locations_district_lawyer", "district_id", "lawyer_id"),
+        Index("ix_lawyer_locations_state_lawyer", "state_id", "lawyer_id"),
+    )
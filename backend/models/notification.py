@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime, func, Text
+from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime, Index, func, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -17,3 +17,5 @@ class Notification(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     user = relationship("User", backref="notifications")
+
+    __table_args__ = (Index('ix_notifications_user_created_id', 'user_id', 'created_at', 'id'),)
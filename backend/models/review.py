@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, func, Text, CheckConstraint
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, func, Text, CheckConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -23,4 +23,5 @@ class Review(Base):
 
     __table_args__ = (
         CheckConstraint('rating >= 1 AND rating <= 5', name='check_rating_range'),
+        Index('ix_reviews_lawyer_created_id', 'lawyer_id', 'created_at', 'id'),
     )
@@ -20,7 +20,8 @@ class BookingCreate(BookingBase):
 class BookingDraft(BaseModel):
     booking_draft_id: str
     original_description: str
-    ai_summary: str
+    ai_summary: Optional[str] = None # None while ai_summary_status is "pending"
+    ai_summary_status: str = "ready" # pending, ready or failed
     lawyer_name: str
     consultation_fee: int
     expires_at: datetime
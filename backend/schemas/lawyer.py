@@ -1,9 +1,9 @@
-from typing import Optional, List
-from pydantic import BaseModel, HttpUrl, validator
+from typing import Optional, List, Literal, Dict
+from pydantic import BaseModel, Field, HttpUrl, validator
 from uuid import UUID
 from datetime import datetime
 from schemas.location import Court
-from schemas.specialization import Specialization
+from schemas.specialization import SpecializationSummary
 
 # Nested schemas for creation
 class LawyerSpecializationCreate(BaseModel):
@@ -12,8 +12,11 @@ class LawyerSpecializationCreate(BaseModel):
 
 # Helper models for response
 class LawyerSpecializationResponse(BaseModel):
-    specialization: Specialization
-    sub_specialization: Optional[Specialization] = None
+    specialization: SpecializationSummary
+    sub_specialization: Optional[SpecializationSummary] = None
+
+    class Config:
+        from_attributes = True
 
 # Shared properties
 class LawyerBase(BaseModel):
@@ -33,19 +36,101 @@ class LawyerCreate(LawyerBase):
     # File URLs will be handled by the endpoint logic and S3 upload
     # The frontend sends multipart/form-data, but we parse it manually or use UploadFile
 
+# Text fields of the multipart /lawyers/register form
+class LawyerRegistrationForm(BaseModel):
+    bar_council_number: str
+    years_experience: int
+    education: Optional[str] = None
+    bio: Optional[str] = None
+    languages: str  # JSON string list
+    consultation_fee: int
+    court_ids: str  # JSON string list of UUIDs
+    specializations: str  # JSON string list of objects
+    # Keys of documents uploaded beforehand via /lawyers/documents/upload
+    bar_council_certificate_key: Optional[str] = None
+    id_proof_key: Optional[str] = None
+    profile_photo_key: Optional[str] = None
+
 # Properties to return via API
 class Lawyer(LawyerBase):
     id: UUID
     user_id: UUID
     verification_status: str
     rejection_reason: Optional[str] = None
-    bar_council_certificate_url: str
-    id_proof_url: str
+    # Identity documents: only in admin and owner responses, null in public ones
+    bar_council_certificate_url: Optional[str] = None
+    id_proof_url: Optional[str] = None
     profile_photo_url: Optional[str] = None
+    profile_photo_thumb_url: Optional[str] = None  # 96x96, for lists; null until generated
+    profile_photo_card_url: Optional[str] = None  # 320x320, for cards and profile headers
     verified_at: Optional[datetime] = None
+    rating_avg: float = 0
+    rating_count: int = 0
     
-    courts: List[Court] = []  # Need to map from relationship
+    courts: List[Court] = []
     specializations: List[LawyerSpecializationResponse] = []
 
+    # Lawyer.courts holds LawyerCourt association rows; expose the Court itself.
+    # Load with core.lawyers.lawyer_load_options() so this never lazy-loads.
+    @validator("courts", pre=True)
+    def unwrap_courts(cls, v):
+        return [getattr(c, "court", c) for c in v or []]
+
     class Config:
         from_attributes = True
+
+# Search sidebar facets
+class FacetCount(BaseModel):
+    value: str
+    label: str
+    count: int
+
+class LawyerSearchFacets(BaseModel):
+    total: int
+    specializations: List[FacetCount] = []
+    courts: List[FacetCount] = []
+    languages: List[FacetCount] = []
+    fee_ranges: List[FacetCount] = []
+
+# Semantic matching from a case description
+class LawyerMatchRequest(BaseModel):
+    description: str
+    top_k: int = Field(5, ge=1, le=20)
+
+class LawyerMatch(BaseModel):
+    score: float
+    lawyer: Lawyer
+
+# Bulk admin verification
+class LawyerVerificationDecision(BaseModel):
+    lawyer_id: UUID
+    action: Literal["approve", "reject"]
+    reason: Optional[str] = None
+
+class LawyerBulkVerify(BaseModel):
+    decisions: List[LawyerVerificationDecision] = Field(..., min_length=1, max_length=5000)
+
+class LawyerVerificationOutcome(BaseModel):
+    lawyer_id: UUID
+    status: str  # approved, rejected, not_found
+
+# Direct-to-storage document uploads
+LawyerDocumentKind = Literal["bar_council_certificate", "id_proof", "profile_photo"]
+
+class LawyerDocumentUploadRequest(BaseModel):
+    kind: LawyerDocumentKind
+    filename: str
+    content_type: str
+    size: int = Field(..., gt=0)
+
+class LawyerDocumentUpload(BaseModel):
+    key: str
+    method: str  # POST (multipart form with `fields` + file) or PUT (raw body with `headers`)
+    url: str
+    fields: Dict[str, str] = {}
+    headers: Dict[str, str] = {}
+    expires_at: datetime
+
+class LawyerDocumentComplete(BaseModel):
+    kind: LawyerDocumentKind
+    key: str
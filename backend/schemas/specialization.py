@@ -7,6 +7,13 @@ class SpecializationBase(BaseModel):
     description: Optional[str] = None
     parent_id: Optional[UUID] = None
 
+# Flat variant for places that must not touch the (lazy, dynamic) sub_specializations
+class SpecializationSummary(SpecializationBase):
+    id: UUID
+
+    class Config:
+        from_attributes = True
+
 class Specialization(SpecializationBase):
     id: UUID
     sub_specializations: List['Specialization'] = []
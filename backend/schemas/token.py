@@ -8,3 +8,9 @@ class Token(BaseModel):
 
 class TokenPayload(BaseModel):
     sub: Optional[str] = None
+    type: Optional[str] = None
+    sid: Optional[str] = None
+    jti: Optional[str] = None
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
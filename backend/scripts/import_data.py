@@ -0,0 +1,488 @@
+"""
+Bulk import of reference data and lawyer rosters from CSV or JSONL.
+
+    python scripts/import_data.py states states.csv
+    python scripts/import_data.py districts districts.csv
+    python scripts/import_data.py courts courts.jsonl --rejects courts_rejects.jsonl
+    python scripts/import_data.py lawyers roster.csv --batch-size 10000
+
+Rows are streamed from the file, COPYed into a temporary staging table one batch at a
+time and merged into the target table with set-based UPDATE/INSERT statements, so memory
+stays bounded by the batch size whatever the size of the file. The whole file is imported
+in one transaction. Rows are matched on natural keys (state code, district name, court
+name, bar council number...), so re-running an import only updates what changed.
+
+Expected columns per entity:
+    states            name, code
+    districts         state_code, name
+    courts            state_code, district, name, type, address
+    police_stations   state_code, district, name, address
+    specializations   name, parent, description     (parent: name of a top-level specialization)
+    lawyers           email, bar_council_number, years_experience, consultation_fee, languages,
+                      bar_council_certificate_url, id_proof_url, education, bio, profile_photo_url
+                      (email of an existing user; languages separated by ";" in CSV). A changed
+                      certificate or ID proof sends a lawyer back to verification.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncpg
+
+from core.config import settings
+from core import search, principals
+from core.lawyers import load_lawyers
+from core.matching import matcher
+from db.session import AsyncSessionLocal
+
+DUPLICATE = "duplicate key in input (a later row wins)"
+COUNTED = {"update": "updated", "insert": "inserted"}
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _int(value: Any) -> Optional[int]:
+    value = _text(value)
+    return int(value) if value is not None else None
+
+
+def _languages(value: Any) -> Optional[List[str]]:
+    if isinstance(value, str):
+        value = value.replace("|", ";").split(";")
+    return search.normalize_languages(value)
+
+
+# Column converters and their staging types
+TYPES = {
+    "text": (_text, "text"),
+    "int": (_int, "integer"),
+    "languages": (_languages, "text[]"),
+}
+
+
+class Entity:
+    """
+    How one target table is imported.
+
+    `fields` are (name, type, required) read from the input; `resolved` are extra uuid
+    columns filled in on the staging table. `steps` run in order after each COPY:
+        ("resolve", sql)          fill resolved columns / side effects, not counted
+        ("reject", reason, sql)   DELETE ... RETURNING line from the staging table
+        ("update", sql)           counted as updated rows
+        ("insert", sql)           counted as inserted rows
+        ("users", sql)            changes users rows, RETURNING their id (cached principals are
+                                  dropped after the commit, see Importer.invalidate_principals)
+    The staging table is available as `stage` in every statement. With `track_changes`,
+    "update" and "insert" statements end in RETURNING the target row id, and those ids
+    are kept in the changed_rows temp table for follow-up work after the commit.
+    """
+
+    def __init__(
+        self, table: str, fields: List[Tuple[str, str, bool]], steps: list, resolved: Tuple[str, ...] = (),
+        track_changes: bool = False
+    ):
+        self.table = table
+        self.fields = fields
+        self.steps = steps
+        self.resolved = resolved
+        self.track_changes = track_changes
+
+    def parse(self, raw: Dict[str, Any]) -> tuple:
+        values = []
+        for name, type_, required in self.fields:
+            convert = TYPES[type_][0]
+            try:
+                value = convert(raw.get(name))
+            except (TypeError, ValueError):
+                raise ValueError(f"invalid {name}")
+            if required and value is None:
+                raise ValueError(f"missing {name}")
+            values.append(value)
+        return tuple(values)
+
+    def staging_ddl(self) -> str:
+        columns = ["line integer NOT NULL"]
+        columns += [f"{name} {TYPES[type_][1]}" for name, type_, _ in self.fields]
+        columns += [f"{name} uuid" for name in self.resolved]
+        return f"CREATE TEMP TABLE stage ({', '.join(columns)}) ON COMMIT DROP"
+
+
+def dedupe(*key: str) -> tuple:
+    """
+    Reject step dropping all but the last row of each key in the batch.
+    """
+    match = " AND ".join(f"a.{k} IS NOT DISTINCT FROM b.{k}" for k in key)
+    return ("reject", DUPLICATE, f"DELETE FROM stage a USING stage b WHERE {match} AND a.line < b.line RETURNING a.line")
+
+
+RESOLVE_DISTRICT = (
+    "resolve",
+    "UPDATE stage SET district_id = d.id FROM districts d JOIN states s ON s.id = d.state_id "
+    "WHERE s.code = upper(stage.state_code) AND d.name = stage.district",
+)
+
+# A new bar council certificate or ID proof needs a new review (as on /lawyers/documents/complete)
+LAWYER_DOCUMENTS_CHANGED = (
+    "(l.bar_council_certificate_url, l.id_proof_url) IS DISTINCT FROM "
+    "(stage.bar_council_certificate_url, stage.id_proof_url)"
+)
+
+ENTITIES: Dict[str, Entity] = {
+    "states": Entity(
+        "states",
+        [("name", "text", True), ("code", "text", True)],
+        [
+            ("resolve", "UPDATE stage SET code = upper(code)"),
+            dedupe("code"),
+            dedupe("name"),
+            ("reject", "name already used by another state code",
+             "DELETE FROM stage WHERE EXISTS (SELECT 1 FROM states s WHERE s.name = stage.name AND s.code <> stage.code) "
+             "RETURNING line"),
+            ("update",
+             "UPDATE states s SET name = stage.name FROM stage "
+             "WHERE s.code = stage.code AND s.name IS DISTINCT FROM stage.name"),
+            ("insert",
+             "INSERT INTO states (id, name, code) SELECT gen_random_uuid(), name, code FROM stage "
+             "WHERE NOT EXISTS (SELECT 1 FROM states s WHERE s.code = stage.code)"),
+        ],
+    ),
+    "districts": Entity(
+        "districts",
+        [("state_code", "text", True), ("name", "text", True)],
+        [
+            ("resolve",
+             "UPDATE stage SET state_id = s.id FROM states s WHERE s.code = upper(stage.state_code)"),
+            ("reject", "unknown state_code", "DELETE FROM stage WHERE state_id IS NULL RETURNING line"),
+            dedupe("state_id", "name"),
+            ("insert",
+             "INSERT INTO districts (id, state_id, name) SELECT gen_random_uuid(), state_id, name FROM stage "
+             "WHERE NOT EXISTS (SELECT 1 FROM districts d WHERE d.state_id = stage.state_id AND d.name = stage.name)"),
+        ],
+        resolved=("state_id",),
+    ),
+    "courts": Entity(
+        "courts",
+        [
+            ("state_code", "text", True), ("district", "text", True), ("name", "text", True),
+            ("type", "text", True), ("address", "text", False),
+        ],
+        [
+            RESOLVE_DISTRICT,
+            ("reject", "unknown state_code/district", "DELETE FROM stage WHERE district_id IS NULL RETURNING line"),
+            dedupe("district_id", "name"),
+            ("update",
+             "UPDATE courts c SET type = stage.type, address = stage.address FROM stage "
+             "WHERE c.district_id = stage.district_id AND c.name = stage.name "
+             "AND (c.type, c.address) IS DISTINCT FROM (stage.type, stage.address)"),
+            ("insert",
+             "INSERT INTO courts (id, district_id, name, type, address) "
+             "SELECT gen_random_uuid(), district_id, name, type, address FROM stage "
+             "WHERE NOT EXISTS (SELECT 1 FROM courts c WHERE c.district_id = stage.district_id AND c.name = stage.name)"),
+        ],
+        resolved=("district_id",),
+    ),
+    "police_stations": Entity(
+        "police_stations",
+        [("state_code", "text", True), ("district", "text", True), ("name", "text", True), ("address", "text", False)],
+        [
+            RESOLVE_DISTRICT,
+            ("reject", "unknown state_code/district", "DELETE FROM stage WHERE district_id IS NULL RETURNING line"),
+            dedupe("district_id", "name"),
+            ("update",
+             "UPDATE police_stations p SET address = stage.address FROM stage "
+             "WHERE p.district_id = stage.district_id AND p.name = stage.name "
+             "AND p.address IS DISTINCT FROM stage.address"),
+            ("insert",
+             "INSERT INTO police_stations (id, district_id, name, address) "
+             "SELECT gen_random_uuid(), district_id, name, address FROM stage "
+             "WHERE NOT EXISTS (SELECT 1 FROM police_stations p "
+             "WHERE p.district_id = stage.district_id AND p.name = stage.name)"),
+        ],
+        resolved=("district_id",),
+    ),
+    "specializations": Entity(
+        "specializations",
+        [("name", "text", True), ("parent", "text", False), ("description", "text", False)],
+        [
+            dedupe("parent", "name"),
+            # Top-level rows first, so children in the same batch can point at them
+            ("update",
+             "UPDATE specializations s SET description = stage.description FROM stage "
+             "WHERE stage.parent IS NULL AND s.parent_id IS NULL AND s.name = stage.name "
+             "AND s.description IS DISTINCT FROM stage.description"),
+            ("insert",
+             "INSERT INTO specializations (id, name, description) "
+             "SELECT gen_random_uuid(), name, description FROM stage WHERE parent IS NULL "
+             "AND NOT EXISTS (SELECT 1 FROM specializations s WHERE s.parent_id IS NULL AND s.name = stage.name)"),
+            ("resolve",
+             "UPDATE stage SET parent_id = s.id FROM specializations s "
+             "WHERE s.parent_id IS NULL AND s.name = stage.parent"),
+            ("reject", "unknown parent specialization",
+             "DELETE FROM stage WHERE parent IS NOT NULL AND parent_id IS NULL RETURNING line"),
+            ("update",
+             "UPDATE specializations s SET description = stage.description FROM stage "
+             "WHERE s.parent_id = stage.parent_id AND s.name = stage.name "
+             "AND s.description IS DISTINCT FROM stage.description"),
+            ("insert",
+             "INSERT INTO specializations (id, name, parent_id, description) "
+             "SELECT gen_random_uuid(), name, parent_id, description FROM stage WHERE parent_id IS NOT NULL "
+             "AND NOT EXISTS (SELECT 1 FROM specializations s WHERE s.parent_id = stage.parent_id AND s.name = stage.name)"),
+        ],
+        resolved=("parent_id",),
+    ),
+    "lawyers": Entity(
+        "lawyers",
+        [
+            ("email", "text", True), ("bar_council_number", "text", True),
+            ("years_experience", "int", True), ("consultation_fee", "int", True),
+            ("languages", "languages", True),
+            ("bar_council_certificate_url", "text", True), ("id_proof_url", "text", True),
+            ("education", "text", False), ("bio", "text", False), ("profile_photo_url", "text", False),
+        ],
+        [
+            ("resolve", "UPDATE stage SET user_id = u.id FROM users u WHERE u.email = stage.email"),
+            ("reject", "unknown user email", "DELETE FROM stage WHERE user_id IS NULL RETURNING line"),
+            dedupe("bar_council_number"),
+            dedupe("user_id"),
+            ("reject", "bar_council_number registered to another user",
+             "DELETE FROM stage WHERE EXISTS (SELECT 1 FROM lawyers l "
+             "WHERE l.bar_council_number = stage.bar_council_number AND l.user_id <> stage.user_id) RETURNING line"),
+            ("reject", "user already has a lawyer profile with another bar_council_number",
+             "DELETE FROM stage WHERE EXISTS (SELECT 1 FROM lawyers l "
+             "WHERE l.user_id = stage.user_id AND l.bar_council_number <> stage.bar_council_number) RETURNING line"),
+            # Before the update below, which makes the documents equal
+            ("users",
+             "UPDATE users u SET is_verified = false FROM lawyers l JOIN stage "
+             "ON stage.bar_council_number = l.bar_council_number "
+             f"WHERE u.id = l.user_id AND u.is_verified AND {LAWYER_DOCUMENTS_CHANGED} RETURNING u.id"),
+            ("update",
+             "UPDATE lawyers l SET years_experience = stage.years_experience, "
+             "consultation_fee = stage.consultation_fee, languages = stage.languages, "
+             "bar_council_certificate_url = stage.bar_council_certificate_url, id_proof_url = stage.id_proof_url, "
+             "education = stage.education, bio = stage.bio, profile_photo_url = stage.profile_photo_url, "
+             f"verification_status = CASE WHEN {LAWYER_DOCUMENTS_CHANGED} "
+             "THEN 'pending_verification' ELSE l.verification_status END, "
+             f"verified_at = CASE WHEN {LAWYER_DOCUMENTS_CHANGED} THEN NULL ELSE l.verified_at END, "
+             f"verified_by = CASE WHEN {LAWYER_DOCUMENTS_CHANGED} THEN NULL ELSE l.verified_by END, "
+             "updated_at = now() FROM stage WHERE l.bar_council_number = stage.bar_council_number "
+             "AND (l.years_experience, l.consultation_fee, l.languages, l.bar_council_certificate_url, "
+             "l.id_proof_url, l.education, l.bio, l.profile_photo_url) IS DISTINCT FROM "
+             "(stage.years_experience, stage.consultation_fee, stage.languages, stage.bar_council_certificate_url, "
+             "stage.id_proof_url, stage.education, stage.bio, stage.profile_photo_url) "
+             "RETURNING l.id"),
+            ("insert",
+             "INSERT INTO lawyers (id, user_id, bar_council_number, years_experience, consultation_fee, languages, "
+             "bar_council_certificate_url, id_proof_url, education, bio, profile_photo_url, verification_status) "
+             "SELECT gen_random_uuid(), user_id, bar_council_number, years_experience, consultation_fee, languages, "
+             "bar_council_certificate_url, id_proof_url, education, bio, profile_photo_url, 'pending_verification' "
+             "FROM stage WHERE NOT EXISTS (SELECT 1 FROM lawyers l WHERE l.bar_council_number = stage.bar_council_number) "
+             "RETURNING id"),
+            ("users",
+             "UPDATE users u SET user_type = 'lawyer' FROM stage WHERE u.id = stage.user_id AND u.user_type = 'user' "
+             "RETURNING u.id"),
+        ],
+        resolved=("user_id",),
+        track_changes=True,
+    ),
+}
+
+
+def read_rows(path: str, fmt: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+    """
+    Yield (line number, row) lazily; row is None when the line cannot be decoded.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_num, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield line_num, row if isinstance(row, dict) else None
+
+
+def _rowcount(status: str) -> int:
+    # "UPDATE 12" / "INSERT 0 12"
+    return int(status.split()[-1])
+
+
+class Importer:
+    def __init__(self, conn: asyncpg.Connection, entity: Entity, rejects_file=None):
+        self.conn = conn
+        self.entity = entity
+        self.rejects_file = rejects_file
+        self.counts = Counter()
+        self.reasons = Counter()
+        self._columns = ["line"] + [name for name, _, _ in entity.fields]
+
+    def reject(self, line: int, reason: str, row: Optional[dict] = None):
+        self.counts["rejected"] += 1
+        self.reasons[reason] += 1
+        if self.rejects_file:
+            self.rejects_file.write(json.dumps({"line": line, "reason": reason, "row": row}, default=str) + "\n")
+
+    async def run(self, rows: Iterator[Tuple[int, Optional[dict]]], batch_size: int):
+        await self.conn.execute(self.entity.staging_ddl())
+        # Ids of users changed by "users" steps, kept past the commit (dropped with the connection)
+        await self.conn.execute("CREATE TEMP TABLE changed_users (id uuid PRIMARY KEY)")
+        # Same for rows of the target table updated or inserted (entities with track_changes)
+        await self.conn.execute("CREATE TEMP TABLE changed_rows (id uuid PRIMARY KEY)")
+        batch: List[tuple] = []
+        raw: Dict[int, dict] = {}
+        for line, row in rows:
+            self.counts["read"] += 1
+            if row is None:
+                self.reject(line, "unreadable row")
+                continue
+            try:
+                batch.append((line,) + self.entity.parse(row))
+            except ValueError as e:
+                self.reject(line, str(e), row)
+                continue
+            raw[line] = row
+            if len(batch) >= batch_size:
+                await self.flush(batch, raw)
+                batch, raw = [], {}
+        if batch:
+            await self.flush(batch, raw)
+
+    async def flush(self, batch: List[tuple], raw: Dict[int, dict]):
+        await self.conn.copy_records_to_table("stage", records=batch, columns=self._columns)
+        for step in self.entity.steps:
+            kind = step[0]
+            if kind == "reject":
+                _, reason, sql = step
+                for record in await self.conn.fetch(sql):
+                    self.reject(record["line"], reason, raw.get(record["line"]))
+            elif kind == "users":
+                await self.conn.execute(
+                    f"WITH changed AS ({step[1]}) INSERT INTO changed_users SELECT id FROM changed ON CONFLICT DO NOTHING"
+                )
+            elif kind in COUNTED and self.entity.track_changes:
+                self.counts[COUNTED[kind]] += await self.conn.fetchval(
+                    f"WITH changed AS ({step[1]}), "
+                    "recorded AS (INSERT INTO changed_rows SELECT id FROM changed ON CONFLICT DO NOTHING) "
+                    "SELECT count(*) FROM changed"
+                )
+            elif kind in COUNTED:
+                self.counts[COUNTED[kind]] += _rowcount(await self.conn.execute(step[1]))
+            else:
+                await self.conn.execute(step[1])
+        await self.conn.execute("TRUNCATE stage")
+        print(f"  {self.counts['read']} rows read...")
+
+    async def changed_ids(self, table: str, batch_size: int) -> AsyncIterator[list]:
+        """
+        Ids recorded in a changed_* temp table, a batch at a time. Call after the import
+        committed, so follow-up work never sees (or caches) the old rows.
+        """
+        async with self.conn.transaction():
+            cursor = await self.conn.cursor(f"SELECT id FROM {table}")
+            while True:
+                ids = [record["id"] for record in await cursor.fetch(batch_size)]
+                if not ids:
+                    return
+                yield ids
+
+    async def invalidate_principals(self, batch_size: int) -> int:
+        """
+        Drop the cached principals of changed users. Returns how many were invalidated.
+        """
+        invalidated = 0
+        async for user_ids in self.changed_ids("changed_users", batch_size):
+            await principals.invalidate(*user_ids)
+            invalidated += len(user_ids)
+        return invalidated
+
+
+async def refresh_imported_lawyers(importer: Importer, batch_size: int) -> int:
+    """
+    Search documents, locations and match vectors of the lawyers an import inserted or
+    updated, a batch at a time; lawyers no longer verified leave /lawyers/match.
+    Returns how many lawyers were refreshed.
+    """
+    refreshed = 0
+    async for lawyer_ids in importer.changed_ids("changed_rows", batch_size):
+        async with AsyncSessionLocal() as db:
+            await search.refresh_search_documents(db, lawyer_ids)
+            await search.refresh_lawyer_locations(db, lawyer_ids)
+            await db.commit()
+            lawyers = await load_lawyers(db, lawyer_ids)
+        await matcher.upsert_lawyers([lawyer for lawyer in lawyers if lawyer.verification_status == "verified"])
+        await matcher.remove_many([lawyer.id for lawyer in lawyers if lawyer.verification_status != "verified"])
+        refreshed += len(lawyer_ids)
+    return refreshed
+
+
+def _detect_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Bulk import reference data and lawyers via COPY.")
+    parser.add_argument("entity", choices=list(ENTITIES))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--rejects", help="write rejected rows (JSONL, with line and reason) to this file")
+    args = parser.parse_args()
+
+    entity = ENTITIES[args.entity]
+    fmt = args.format or _detect_format(args.path)
+    print(f"Importing {args.entity} from {args.path} ({fmt})...")
+
+    # COPY needs the raw driver connection
+    conn = await asyncpg.connect(settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1))
+    rejects_file = open(args.rejects, "w", encoding="utf-8") if args.rejects else None
+    try:
+        importer = Importer(conn, entity, rejects_file)
+        async with conn.transaction():
+            await importer.run(read_rows(args.path, fmt), args.batch_size)
+        # Only the Redis copies: workers' in-process copies expire within PRINCIPAL_CACHE_LOCAL_TTL
+        invalidated = await importer.invalidate_principals(args.batch_size)
+        if entity.table == "lawyers":
+            print("Refreshing search documents and match vectors of imported lawyers...")
+            refreshed = await refresh_imported_lawyers(importer, args.batch_size)
+            if refreshed:
+                await search.invalidate_search_cache()
+    finally:
+        await conn.close()
+        if rejects_file:
+            rejects_file.close()
+
+    counts = importer.counts
+    print(
+        f"Done: {counts['read']} read, {counts['inserted']} inserted, "
+        f"{counts['updated']} updated, {counts['rejected']} rejected"
+    )
+    for reason, count in importer.reasons.most_common():
+        print(f"  rejected {count}: {reason}")
+
+    if invalidated:
+        print(f"  {invalidated} cached users invalidated")
+    if entity.table == "lawyers":
+        print(f"  {refreshed} lawyers reindexed")
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main())
@@ -0,0 +1,30 @@
+import asyncio
+import sys
+import os
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+from db.session import AsyncSessionLocal
+from core.lawyers import lawyer_load_options
+from core.matching import matcher, lawyer_document
+from models.lawyer import Lawyer
+
+async def main():
+    print("Rebuilding lawyer match index...")
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Lawyer)
+            .where(Lawyer.verification_status == "verified")
+            .options(*lawyer_load_options())
+        )
+        documents = [(str(lawyer.id), lawyer_document(lawyer)) for lawyer in result.scalars().all()]
+
+    matcher.rebuild(documents)
+    print(f"Indexed {len(documents)} lawyers into {matcher.path}")
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main())
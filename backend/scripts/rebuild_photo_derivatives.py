@@ -0,0 +1,47 @@
+import asyncio
+import sys
+import os
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, or_
+from db.session import AsyncSessionLocal
+from core import search
+from core.config import settings
+from core.lawyers import generate_photo_derivatives
+from models.lawyer import Lawyer
+
+async def main():
+    # --all re-renders every photo (e.g. after changing the sizes), otherwise only missing ones
+    rebuild_all = "--all" in sys.argv[1:]
+    print("Generating profile photo derivatives...")
+    async with AsyncSessionLocal() as db:
+        stmt = select(Lawyer.id, Lawyer.profile_photo_url).where(Lawyer.profile_photo_url.isnot(None))
+        if not rebuild_all:
+            stmt = stmt.where(or_(Lawyer.profile_photo_thumb_url.is_(None), Lawyer.profile_photo_card_url.is_(None)))
+        photos = (await db.execute(stmt)).all()
+
+    # Keep the image process pool busy without queueing every photo in memory at once
+    semaphore = asyncio.Semaphore(settings.IMAGE_WORKERS * 2)
+    failed = 0
+
+    async def process(lawyer_id, photo_key):
+        nonlocal failed
+        async with semaphore:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await generate_photo_derivatives(db, lawyer_id, photo_key)
+                    await db.commit()
+            except Exception as e:
+                failed += 1
+                print(f"Failed for lawyer {lawyer_id}: {e}")
+
+    await asyncio.gather(*(process(lawyer_id, photo_key) for lawyer_id, photo_key in photos))
+    await search.invalidate_search_cache()
+    print(f"Processed {len(photos) - failed} photos ({failed} failed)")
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main())
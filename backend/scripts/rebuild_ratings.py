@@ -0,0 +1,23 @@
+import asyncio
+import sys
+import os
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.session import AsyncSessionLocal
+from core import search
+from core.lawyers import rebuild_rating_aggregates
+
+async def main():
+    print("Rebuilding lawyer rating aggregates...")
+    async with AsyncSessionLocal() as db:
+        await rebuild_rating_aggregates(db)
+        await db.commit()
+    await search.invalidate_search_cache()
+    print("Rating aggregates rebuilt successfully!")
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main())
@@ -0,0 +1,23 @@
+import asyncio
+import sys
+import os
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.session import AsyncSessionLocal
+from core import search
+
+async def main():
+    print("Rebuilding lawyer search documents and location mapping...")
+    async with AsyncSessionLocal() as db:
+        await search.refresh_search_documents(db)
+        await search.refresh_lawyer_locations(db)
+        await db.commit()
+    await search.invalidate_search_cache()
+    print("Search index rebuilt successfully!")
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main())
@@ -0,0 +1,15 @@
+"""
+Settings are fixed here, before anything imports core.config: no Redis server (tests
+that need one use fakeredis), drafts kept in memory, uploads in a temporary directory.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/15")
+os.environ["DRAFT_STORE"] = "memory"
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["LOCAL_STORAGE_DIR"] = tempfile.mkdtemp(prefix="legal-booking-tests-")
+
+# Registers every model, so relationships between them resolve
+import db.base  # noqa: E402,F401
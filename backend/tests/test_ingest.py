@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from core import ingest, storage
+from core.ingest import FileRule, receive_multipart
+
+BOUNDARY = "----test-boundary"
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 200
+PDF = b"%PDF-1.7\n" + b"x" * 200
+
+RULES = {
+    "photo": FileRule(max_bytes=1024, content_types={"image/png", "image/jpeg"}),
+    "document": FileRule(max_bytes=4096, content_types={"application/pdf"}),
+}
+
+
+def _part(name: str, value: bytes, filename: str = None, content_type: str = "application/octet-stream") -> bytes:
+    disposition = f'form-data; name="{name}"'
+    headers = f"Content-Disposition: {disposition}\r\n"
+    if filename is not None:
+        headers = f'Content-Disposition: {disposition}; filename="{filename}"\r\nContent-Type: {content_type}\r\n'
+    return f"--{BOUNDARY}\r\n{headers}\r\n".encode() + value + b"\r\n"
+
+
+def _body(*parts: bytes) -> bytes:
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode()
+
+
+def _request(body: bytes, chunk_size: int = 7, content_length: int = None) -> Request:
+    # Small chunks, so signatures and boundaries are split across reads
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    received = []
+
+    async def receive():
+        chunk = chunks.pop(0) if chunks else b""
+        received.append(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    headers = [
+        (b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode()),
+        (b"content-length", str(len(body) if content_length is None else content_length).encode()),
+    ]
+    request = Request({"type": "http", "method": "POST", "headers": headers}, receive)
+    request.received = received
+    return request
+
+
+def _receive(request: Request, rules=RULES):
+    return asyncio.run(receive_multipart(request, rules))
+
+
+def _reject(request: Request, status_code: int, rules=RULES):
+    with pytest.raises(HTTPException) as exc:
+        _receive(request, rules)
+    assert exc.value.status_code == status_code
+
+
+def _pending_files() -> list:
+    tmp_dir = os.path.join(storage.get_backend().root, ".tmp")
+    return os.listdir(tmp_dir) if os.path.isdir(tmp_dir) else []
+
+
+def test_streams_files_and_fields():
+    upload = _receive(_request(_body(
+        _part("bio", "Family law, 12 years".encode()),
+        _part("photo", PNG, "me.png", "image/png"),
+        _part("document", PDF, "bar.pdf", "application/pdf"),
+    )))
+    assert upload.fields == {"bio": "Family law, 12 years"}
+    photo, document = upload.files["photo"], upload.files["document"]
+    assert (photo.content_type, photo.size, photo.digest) == ("image/png", len(PNG), hashlib.sha256(PNG).hexdigest())
+    assert document.content_type == "application/pdf"
+
+    key = asyncio.run(photo.commit("lawyers/photos"))
+    assert key.endswith(f"{photo.digest}.png")
+    assert asyncio.run(storage.get_backend().read(key)) == PNG
+    asyncio.run(upload.abort())
+    assert _pending_files() == []
+
+
+def test_content_type_is_sniffed_not_trusted():
+    # A PDF labelled as PNG is still a PDF
+    _reject(_request(_body(_part("photo", PDF, "me.png", "image/png"))), 415)
+    assert _pending_files() == []
+
+
+def test_file_shorter_than_sniff_window():
+    rules = {"photo": FileRule(max_bytes=1024, content_types={"image/gif"})}
+    upload = _receive(_request(_body(_part("photo", b"GIF89a\x01\x00", "a.gif", "image/gif"))), rules)
+    assert upload.files["photo"].content_type == "image/gif"
+    asyncio.run(upload.abort())
+
+
+def test_empty_file_part_is_skipped():
+    upload = _receive(_request(_body(_part("photo", b"", "", "application/octet-stream"))))
+    assert upload.files == {}
+
+
+def test_oversized_file_is_refused_while_streaming():
+    big = PNG + b"\x00" * 2048
+    request = _request(_body(_part("photo", big, "me.png", "image/png"), _part("document", PDF, "b.pdf")))
+    _reject(request, 413)
+    assert _pending_files() == []
+    # Stopped at the limit, without reading the rest of the body
+    assert sum(len(chunk) for chunk in request.received) < len(big)
+
+
+def test_oversized_body_is_refused_before_reading():
+    limit = sum(rule.max_bytes for rule in RULES.values()) + ingest.MAX_PARTS * ingest.MAX_TEXT_FIELD_BYTES
+    request = _request(_body(_part("bio", b"hi")), content_length=limit + 1)
+    _reject(request, 413)
+    assert request.received == []
+
+
+def test_text_field_limit():
+    _reject(_request(_body(_part("bio", b"x" * (ingest.MAX_TEXT_FIELD_BYTES + 1))), chunk_size=4096), 413)
+
+
+def test_too_many_parts():
+    parts = [_part(f"field{i}", b"x") for i in range(ingest.MAX_PARTS + 1)]
+    _reject(_request(_body(*parts), chunk_size=1024), 400)
+
+
+def test_unexpected_file_field():
+    _reject(_request(_body(_part("avatar", PNG, "me.png", "image/png"))), 400)
+
+
+def test_duplicate_field():
+    _reject(_request(_body(_part("photo", PNG, "a.png"), _part("photo", PNG, "b.png"))), 400)
+    assert _pending_files() == []
+
+
+def test_not_multipart():
+    request = Request({"type": "http", "method": "POST", "headers": [(b"content-type", b"application/json")]})
+    _reject(request, 400)
@@ -0,0 +1,87 @@
+import base64
+import json
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from core import search
+from core.pagination import _sort_id, decode_cursor, encode_cursor
+from models.booking import Booking
+from models.chat import Message
+
+BOOKING_KEYS = [(Booking.created_at, True), (Booking.id, True)]
+
+
+def _raw_cursor(keys, items) -> str:
+    raw = json.dumps({"s": _sort_id(keys), "v": items})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _assert_invalid(cursor, keys):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, keys)
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "Invalid cursor"
+
+
+def test_round_trip():
+    values = [datetime(2024, 5, 1, 9, 30, tzinfo=timezone.utc), uuid.uuid4()]
+    assert decode_cursor(encode_cursor(BOOKING_KEYS, values), BOOKING_KEYS) == values
+
+
+def test_round_trip_relevance():
+    keys = search.sort_keys("relevance", "divorce")
+    values = [0.4375, uuid.uuid4()]
+    assert decode_cursor(encode_cursor(keys, values), keys) == values
+    # A rank that happens to be whole comes back from JSON as an int
+    assert decode_cursor(encode_cursor(keys, [1, values[1]]), keys) == [1, values[1]]
+
+
+def test_round_trip_null_value():
+    values = [None, uuid.uuid4()]
+    assert decode_cursor(encode_cursor(BOOKING_KEYS, values), BOOKING_KEYS) == values
+
+
+def test_rejects_cursor_of_another_sort_order():
+    values = [datetime.now(timezone.utc), uuid.uuid4()]
+    cursor = encode_cursor(BOOKING_KEYS, values)
+    _assert_invalid(cursor, [(Message.timestamp, False), (Message.id, False)])
+    _assert_invalid(cursor, [(Booking.created_at, False), (Booking.id, False)])
+    _assert_invalid(cursor, search.sort_keys("rating"))
+
+
+def test_relevance_cursor_survives_a_new_query():
+    # The order is the same whatever the words; only the values bind it to a page
+    cursor = encode_cursor(search.sort_keys("relevance", "divorce"), [0.5, uuid.uuid4()])
+    decode_cursor(cursor, search.sort_keys("relevance", "property dispute"))
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "!!!!", base64.urlsafe_b64encode(b"[1, 2]").decode()])
+def test_rejects_garbage(cursor):
+    _assert_invalid(cursor, BOOKING_KEYS)
+
+
+@pytest.mark.parametrize("items", [
+    [["dt", "2024-05-01T09:30:00+00:00"]],
+    [["dt", "2024-05-01T09:30:00+00:00"], ["uuid", str(uuid.uuid4())], ["v", 1]],
+    [["v", 1714555800], ["uuid", str(uuid.uuid4())]],
+    [["dt", "2024-05-01T09:30:00+00:00"], ["v", str(uuid.uuid4())]],
+    [["dt", "yesterday"], ["uuid", str(uuid.uuid4())]],
+    [["dt", "2024-05-01T09:30:00+00:00"], ["uuid", 5]],
+    [["dt", "2024-05-01T09:30:00+00:00"], ["v", {"$gt": ""}]],
+    [["dt", "2024-05-01T09:30:00+00:00"], "uuid"],
+    "values",
+])
+def test_rejects_tampered_values(items):
+    _assert_invalid(_raw_cursor(BOOKING_KEYS, items), BOOKING_KEYS)
+
+
+def test_rejects_values_of_the_wrong_type_for_numeric_keys():
+    keys = search.sort_keys("experience")
+    lawyer_id = str(uuid.uuid4())
+    decode_cursor(_raw_cursor(keys, [["v", 12], ["uuid", lawyer_id]]), keys)
+    _assert_invalid(_raw_cursor(keys, [["v", "12"], ["uuid", lawyer_id]]), keys)
+    _assert_invalid(_raw_cursor(keys, [["v", True], ["uuid", lawyer_id]]), keys)
+    _assert_invalid(_raw_cursor(keys, [["v", 12.5], ["uuid", lawyer_id]]), keys)
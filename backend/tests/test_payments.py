@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import hmac
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+from api.v1.endpoints import payments
+from core import drafts
+from core.config import settings
+from models.booking import Booking
+from models.payment import Payment
+from schemas.payment import PaymentVerify
+
+
+class FakeSession:
+    """
+    Just enough of AsyncSession for verify_payment, with the unique constraint on
+    payments.razorpay_order_id.
+    """
+
+    def __init__(self):
+        self.pending = []
+        self.committed = []
+
+    def add(self, obj):
+        self.pending.append(obj)
+
+    async def commit(self):
+        orders = {obj.razorpay_order_id for obj in self.committed if isinstance(obj, Payment)}
+        if any(isinstance(obj, Payment) and obj.razorpay_order_id in orders for obj in self.pending):
+            raise IntegrityError("INSERT INTO payments", {}, Exception("duplicate razorpay_order_id"))
+        self.committed.extend(self.pending)
+        self.pending = []
+
+    async def rollback(self):
+        self.pending = []
+
+    async def execute(self, stmt):
+        # select(Payment.booking_id).where(Payment.razorpay_order_id == :order_id)
+        order_id = stmt.whereclause.right.value
+        booking_ids = [obj.booking_id for obj in self.of_type(Payment) if obj.razorpay_order_id == order_id]
+        return _Result(booking_ids[0] if booking_ids else None)
+
+    def of_type(self, cls) -> list:
+        return [obj for obj in self.committed if isinstance(obj, cls)]
+
+
+class _Result:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+
+DRAFT = {
+    "user_id": str(uuid.uuid4()),
+    "lawyer_id": str(uuid.uuid4()),
+    "original_description": "Landlord will not return my deposit",
+    "ai_summary": "Tenancy deposit dispute",
+    "consultation_fee": "1500",
+}
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = drafts.MemoryDraftStore()
+    monkeypatch.setattr(drafts, "get_store", lambda: store)
+    return store
+
+
+def _verification(order_id: str) -> PaymentVerify:
+    payment_id = f"pay_{uuid.uuid4().hex[:14]}"
+    signature = hmac.new(
+        settings.RAZORPAY_KEY_SECRET.encode(), f"{order_id}|{payment_id}".encode(), hashlib.sha256
+    ).hexdigest()
+    return PaymentVerify(razorpay_order_id=order_id, razorpay_payment_id=payment_id, razorpay_signature=signature)
+
+
+def _verify(db: FakeSession, payment_in: PaymentVerify) -> dict:
+    return asyncio.run(payments.verify_payment(payment_in=payment_in, db=db))
+
+
+def _ordered_draft(store, order_id: str) -> str:
+    draft_id = uuid.uuid4().hex
+
+    async def create():
+        await store.create(draft_id, DRAFT)
+        assert await store.attach_order(draft_id, order_id)
+
+    asyncio.run(create())
+    return draft_id
+
+
+def test_verify_creates_the_booking(store):
+    db = FakeSession()
+    _ordered_draft(store, "order_1")
+    result = _verify(db, _verification("order_1"))
+    assert result["success"] is True
+    [booking] = db.of_type(Booking)
+    assert str(booking.id) == result["booking_id"]
+    assert (booking.consultation_fee, booking.platform_commission, booking.lawyer_payout) == (1500, 150, 1350)
+
+
+def test_replay_returns_the_same_booking(store):
+    db = FakeSession()
+    _ordered_draft(store, "order_2")
+    payment_in = _verification("order_2")
+    first = _verify(db, payment_in)
+    # A retried callback, or the client verifying again after a timeout
+    assert _verify(db, payment_in) == first
+    assert _verify(db, _verification("order_2")) == first
+    assert len(db.of_type(Booking)) == 1
+    assert len(db.of_type(Payment)) == 1
+
+
+def test_restored_draft_of_a_recorded_order_returns_the_same_booking(store):
+    db = FakeSession()
+    draft_id = _ordered_draft(store, "order_3")
+    payment_in = _verification("order_3")
+    first = _verify(db, payment_in)
+    # A request cancelled after its commit puts the draft back
+    asyncio.run(store.restore(draft_id, "order_3", DRAFT))
+    assert _verify(db, payment_in) == first
+    assert len(db.of_type(Booking)) == 1
+
+
+def test_unknown_order(store):
+    with pytest.raises(HTTPException) as exc:
+        _verify(FakeSession(), _verification("order_unknown"))
+    assert exc.value.status_code == 400
+
+
+def test_invalid_signature_keeps_the_draft(store):
+    db = FakeSession()
+    _ordered_draft(store, "order_4")
+    forged = _verification("order_4").model_copy(update={"razorpay_signature": "0" * 64})
+    with pytest.raises(HTTPException) as exc:
+        _verify(db, forged)
+    assert exc.value.status_code == 400
+    assert db.committed == []
+    # The genuine callback still goes through
+    assert _verify(db, _verification("order_4"))["success"] is True
+
+
+def test_failed_booking_restores_the_draft(store, monkeypatch):
+    db = FakeSession()
+    _ordered_draft(store, "order_5")
+
+    async def fail(db, payment_in, draft):
+        raise ConnectionError("database went away")
+
+    create_paid_booking = payments._create_paid_booking
+    monkeypatch.setattr(payments, "_create_paid_booking", fail)
+    with pytest.raises(ConnectionError):
+        _verify(db, _verification("order_5"))
+    monkeypatch.setattr(payments, "_create_paid_booking", create_paid_booking)
+    assert _verify(db, _verification("order_5"))["success"] is True
@@ -0,0 +1,89 @@
+import asyncio
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+
+from core import sessions
+from core.config import settings
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(sessions, "redis", client)
+    monkeypatch.setattr(sessions, "_ROTATE", client.register_script(sessions._ROTATE.script))
+    monkeypatch.setattr(sessions, "_revocations", sessions._RevocationFilter())
+    return client
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(sessions, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def _login(user_id="user-1") -> sessions.TokenPayload:
+    tokens = asyncio.run(sessions.create_session(user_id))
+    return sessions.decode_refresh_token(tokens["refresh_token"])
+
+
+def _refresh(payload: sessions.TokenPayload) -> sessions.TokenPayload:
+    tokens = asyncio.run(sessions.rotate_session(payload))
+    return sessions.decode_refresh_token(tokens["refresh_token"])
+
+
+def _refused(payload: sessions.TokenPayload):
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(sessions.rotate_session(payload))
+    assert exc.value.status_code == 401
+
+
+def test_rotation_issues_a_new_token(redis, clock):
+    first = _login()
+    second = _refresh(first)
+    assert second.sid == first.sid and second.jti != first.jti
+    assert _refresh(second).jti not in {first.jti, second.jti}
+
+
+def test_concurrent_refresh_within_grace_gets_the_current_token(redis, clock):
+    first = _login()
+    second = _refresh(first)
+    clock[0] += settings.REFRESH_REUSE_GRACE_SECONDS
+    # The other tab's request, carrying the token just rotated away
+    again = _refresh(first)
+    assert again.jti == second.jti
+    # Nothing was revoked: the current token keeps rotating
+    assert not asyncio.run(sessions.is_session_revoked(first.sid))
+    _refresh(second)
+
+
+def test_reuse_after_grace_revokes_the_session(redis, clock):
+    first = _login()
+    second = _refresh(first)
+    clock[0] += settings.REFRESH_REUSE_GRACE_SECONDS + 1
+    _refused(first)
+    assert asyncio.run(sessions.is_session_revoked(first.sid))
+    # The legitimate holder is logged out too
+    _refused(second)
+
+
+def test_only_the_last_rotated_token_has_grace(redis, clock):
+    first = _login()
+    second = _refresh(first)
+    _refresh(second)
+    _refused(first)
+    assert asyncio.run(sessions.is_session_revoked(first.sid))
+
+
+def test_revoke_user_sessions(redis, clock):
+    payloads = [_login("user-2") for _ in range(3)]
+    other = _login("user-3")
+    assert asyncio.run(sessions.revoke_user_sessions("user-2")) == 3
+    for payload in payloads:
+        _refused(payload)
+        assert asyncio.run(sessions.is_session_revoked(payload.sid))
+    assert not asyncio.run(sessions.is_session_revoked(other.sid))
+    _refresh(other)
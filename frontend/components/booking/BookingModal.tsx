@@ -1,6 +1,6 @@
 'use client';
 
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import { Dialog, DialogContent, DialogDescription, DialogHeader, DialogTitle, DialogTrigger } from "@/components/ui/dialog";
 import { Button } from "@/components/ui/button";
 import { Textarea } from "@/components/ui/textarea";
@@ -31,6 +31,35 @@ export default function BookingModal({ lawyerId, lawyerName, consultationFee, tr
 
     // Draft State
     const [draft, setDraft] = useState<any>(null);
+    const summaryPending = draft?.ai_summary_status === 'pending';
+
+    // Failed polls in a row; retries back off, and each one re-runs the polling effect
+    const [pollFailures, setPollFailures] = useState(0);
+
+    // The AI summary is written in the background; poll the draft until it is ready
+    useEffect(() => {
+        if (!summaryPending) return;
+        const delay = Math.min(1000 * 2 ** pollFailures, 10000);
+        const timer = setTimeout(async () => {
+            try {
+                setDraft(await bookingsAPI.getDraft(draft.booking_draft_id));
+                setPollFailures(0);
+                setError("");
+            } catch (err: any) {
+                console.error(err);
+                if (err.response?.status === 404) {
+                    // Draft expired: nothing left to wait for, start over
+                    setDraft(null);
+                    setStep('input');
+                    setError("Your booking draft expired. Please submit it again.");
+                    return;
+                }
+                setError("Still generating the summary, retrying...");
+                setPollFailures((failures) => failures + 1);
+            }
+        }, delay);
+        return () => clearTimeout(timer);
+    }, [draft, summaryPending, pollFailures]);
 
     const handleCreateDraft = async () => {
         if (!description || !date) {
@@ -84,6 +113,7 @@ export default function BookingModal({ lawyerId, lawyerName, consultationFee, tr
         setDescription("");
         setDate(undefined);
         setDraft(null);
+        setPollFailures(0);
         setError("");
     }
 
@@ -171,7 +201,14 @@ export default function BookingModal({ lawyerId, lawyerName, consultationFee, tr
                             <div className="bg-slate-50 p-4 rounded-lg space-y-3 border">
                                 <div>
                                     <h4 className="font-semibold text-sm text-slate-500 uppercase tracking-wider mb-1">AI Summary</h4>
-                                    <p className="text-sm leading-relaxed">{draft.ai_summary}</p>
+                                    {summaryPending ? (
+                                        <p className="text-sm text-slate-500 flex items-center">
+                                            <Loader2 className="mr-2 h-4 w-4 animate-spin" />
+                                            Generating summary...
+                                        </p>
+                                    ) : (
+                                        <p className="text-sm leading-relaxed">{draft.ai_summary}</p>
+                                    )}
                                 </div>
                                 <div className="border-t pt-3 flex justify-between items-center">
                                     <span className="text-sm font-medium">Consultation Fee</span>
@@ -185,7 +222,7 @@ export default function BookingModal({ lawyerId, lawyerName, consultationFee, tr
 
                             <div className="flex gap-3 justify-end">
                                 <Button variant="outline" onClick={() => setStep('input')}>Back</Button>
-                                <Button onClick={handleConfirmPayment} disabled={isLoading} className="bg-green-600 hover:bg-green-700">
+                                <Button onClick={handleConfirmPayment} disabled={isLoading || summaryPending} className="bg-green-600 hover:bg-green-700">
                                     {isLoading && <Loader2 className="mr-2 h-4 w-4 animate-spin" />}
                                     Pay & Confirm Booking
                                 </Button>
@@ -66,6 +66,10 @@ export const bookingsAPI = {
         const response = await api.post('/bookings/create', data);
         return response.data;
     },
+    getDraft: async (draftId: string) => {
+        const response = await api.get(`/bookings/drafts/${draftId}`);
+        return response.data;
+    },
     confirmBooking: async (draftId: string) => {
         const response = await api.post(`/bookings/confirm?booking_draft_id=${draftId}`);
         return response.data;